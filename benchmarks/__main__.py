@@ -0,0 +1,67 @@
+"""Run the benchmarks against the fixture app with a local browser.
+
+    python -m benchmarks --output results.json --compare baseline.json
+
+Set BENCHMARK_BROWSER (chrome or firefox) and BENCHMARK_DRIVER_PATH to pick
+the browser, BENCHMARK_HEADLESS=0 to show it and BENCHMARK_REPEAT to change
+the number of repetitions. With --if-available the run is skipped when the
+driver executable is not installed, e.g. on CI machines without a browser.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import django
+
+DEFAULT_LABELS = ['benchmarks.cases']
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('labels', nargs='*', default=DEFAULT_LABELS,
+                        help='test labels, e.g. benchmarks.cases.WaitBenchmarks')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='results file to compare the run against')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--if-available', action='store_true',
+                        help='skip the run if the driver is not installed')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+    from django.conf import settings
+    from django.test.runner import DiscoverRunner
+    from puppetmaster.drivers import browser_name
+    from .results import DEFAULT_REGRESSION_THRESHOLD, compare, results
+
+    if args.if_available and shutil.which(settings.PM__SELENIUM_DRIVER_PATH) is None:
+        print(f'Skipped, {settings.PM__SELENIUM_DRIVER_PATH} is not installed')
+        return 0
+
+    failures = DiscoverRunner(verbosity=1).run_tests(args.labels)
+    results.write(args.output,
+                  browser=browser_name(settings.PM__SELENIUM_DRIVER),
+                  headless=settings.HEADLESS,
+                  repeat=settings.BENCHMARK_REPEAT)
+    print(f'Results written to {args.output}')
+    for name, result in results.summary().items():
+        print(f"{name:<60} {result['median']:8.3f}s (runs: {result['runs']})")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(baseline, results.summary(),
+                              args.threshold or DEFAULT_REGRESSION_THRESHOLD)
+        for name, ratio in regressions:
+            print(f'Regression: {name} is {ratio:.2f}x slower than the baseline')
+        if regressions:
+            return 1
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
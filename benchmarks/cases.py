@@ -0,0 +1,123 @@
+import typing as t
+
+from django.conf import settings
+
+from puppetmaster import SeleniumLiveServerTestCase
+from puppetmaster.form_filling import FillModes
+from puppetmaster.waiter import WaitBackends
+
+from .results import results
+
+FORM_SIZES = [10, 100, 1000]
+REACT_SELECT_OPTIONS = [100, 1000]
+BIG_PAGE_ROWS = 20000
+SLOW_PAGE_DELAY = 300
+
+
+class BenchmarkTestCase(SeleniumLiveServerTestCase):
+    """Times setUp and tearDown, and the operations wrapped in `timed`"""
+    should_login_automatically = False
+    starting_url = '/form/10/'
+
+    @property
+    def repeat(self) -> int:
+        return settings.BENCHMARK_REPEAT
+
+    def timed(self, name: str) -> t.ContextManager[None]:
+        return results.timed(f'{type(self).__name__}.{name}')
+
+    def setUp(self) -> None:
+        with self.timed('setUp'):
+            super().setUp()
+
+    def tearDown(self) -> None:
+        with self.timed('tearDown'):
+            super().tearDown()
+
+
+class FormFillingBenchmarks(BenchmarkTestCase):
+    def fill_forms(self, mode: str) -> None:
+        for fields in FORM_SIZES:
+            data = {f'field_{index}': f'Value {index}' for index in range(fields)}
+            for _ in range(self.repeat):
+                self.open_page(f'/form/{fields}/')
+                with self.timed(f'fill_form_and_submit[{fields},{mode}]'):
+                    self.fill_form_and_submit('#benchmark-form', _fill_mode=mode,
+                                              **data)
+                self.assert_in_css_selector('#result', f'Submitted {fields} fields')
+
+    def test_fill_form_and_submit(self) -> None:
+        self.fill_forms(FillModes.Default)
+
+    def test_fill_form_and_submit_batched(self) -> None:
+        self.fill_forms(FillModes.Batched)
+
+    def test_react_select_options(self) -> None:
+        for options in REACT_SELECT_OPTIONS:
+            for use_filter in [False, True]:
+                for _ in range(self.repeat):
+                    self.open_page(f'/react-select/{options}/')
+                    selects = self.wait_for_elements('.Select')
+                    data = {f'select_{index}': f'Option {options - 1}'
+                            for index in range(len(selects))}
+                    name = f'react_select_options[{options},filter={use_filter}]'
+                    with self.timed(name):
+                        self.react_select_options(
+                            selects, _use_filter=use_filter, **data)
+
+
+class WaitBenchmarks(BenchmarkTestCase):
+    def open_slow_page(self) -> None:
+        self.open_page(f'/slow/{SLOW_PAGE_DELAY}/')
+
+    def test_wait_for_element(self) -> None:
+        for _ in range(self.repeat):
+            self.open_slow_page()
+            with self.timed('wait_for_element'):
+                self.wait_for_element('.slow-item')
+
+    def test_wait_for_elements(self) -> None:
+        for _ in range(self.repeat):
+            self.open_slow_page()
+            with self.timed('wait_for_elements'):
+                self.wait_for_elements('.slow-item')
+
+    def test_wait(self) -> None:
+        for _ in range(self.repeat):
+            self.open_slow_page()
+            with self.timed('wait'):
+                self.wait(lambda driver: driver.find_elements_by_css_selector(
+                    '.slow-item'))
+
+
+class ObserverWaitBenchmarks(WaitBenchmarks):
+    WAIT_BACKEND = WaitBackends.Observer
+
+
+class AssertionBenchmarks(BenchmarkTestCase):
+    def test_assert_on_page(self) -> None:
+        for _ in range(self.repeat):
+            self.open_page('/form/10/')
+            with self.timed('assert_on_page'):
+                self.assert_on_page('/form/10/')
+
+    def test_assert_in_css_selector(self) -> None:
+        for _ in range(self.repeat):
+            self.open_page(f'/slow/{SLOW_PAGE_DELAY}/')
+            with self.timed('assert_in_css_selector'):
+                self.assert_in_css_selector('#slow', 'Rendered 9')
+
+    def test_assert_in_page_source(self) -> None:
+        for rows in [10, BIG_PAGE_ROWS]:
+            for regex in [False, True]:
+                for _ in range(self.repeat):
+                    self.open_page(f'/big-page/{rows}/')
+                    with self.timed(f'assert_in_page_source[{rows},regex={regex}]'):
+                        self.assert_in_page_source(
+                            f'Row {rows - 1}' if not regex else r'Row \d+</td>',
+                            'End of page',
+                            regex=regex)
+
+
+class InBrowserAssertionBenchmarks(AssertionBenchmarks):
+    SEARCH_PAGE_SOURCE_IN_BROWSER = True
@@ -0,0 +1,65 @@
+// Minimal stand-in for react-select 1.x: same markup and mouse/input events,
+// without React. The hidden input holding the value is only rendered once an
+// option is selected, as in react-select.
+function renderSelect(parent, name, options) {
+  var select = document.createElement('div');
+  select.className = 'Select';
+  select.innerHTML = (
+    '<div class="Select-control">' +
+    '<span class="Select-placeholder">Select...</span>' +
+    '<div class="Select-input"><input type="text"></div>' +
+    '<span class="Select-arrow-zone"><span class="Select-arrow"></span></span>' +
+    '</div>');
+  parent.appendChild(select);
+
+  var control = select.querySelector('.Select-control');
+  var filterInput = select.querySelector('.Select-input input');
+
+  function closeMenu() {
+    var menu = select.querySelector('.Select-menu-outer');
+    if (menu) {
+      select.removeChild(menu);
+    }
+  }
+
+  function choose(label) {
+    var hidden = select.querySelector('input[type="hidden"]');
+    if (!hidden) {
+      hidden = document.createElement('input');
+      hidden.type = 'hidden';
+      hidden.name = name;
+      select.appendChild(hidden);
+    }
+    hidden.value = label;
+    select.querySelector('.Select-placeholder').textContent = label;
+    filterInput.value = '';
+    closeMenu();
+  }
+
+  function openMenu() {
+    closeMenu();
+    var filter = filterInput.value.toLowerCase();
+    var outer = document.createElement('div');
+    outer.className = 'Select-menu-outer';
+    var menu = document.createElement('div');
+    menu.className = 'Select-menu';
+    options.forEach(function (label) {
+      if (filter && label.toLowerCase().indexOf(filter) === -1) {
+        return;
+      }
+      var option = document.createElement('div');
+      option.className = 'Select-option';
+      option.textContent = label;
+      option.addEventListener('mousedown', function (event) {
+        event.stopPropagation();
+        choose(label);
+      });
+      menu.appendChild(option);
+    });
+    outer.appendChild(menu);
+    select.appendChild(outer);
+  }
+
+  control.addEventListener('mousedown', openMenu);
+  filterInput.addEventListener('input', openMenu);
+}
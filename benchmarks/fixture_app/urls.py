@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('form/<int:fields>/', views.form, name='form'),
+    path('submitted/<int:fields>/', views.submitted, name='submitted'),
+    path('react-select/<int:options>/', views.react_select, name='react_select'),
+    path('slow/<int:delay>/', views.slow, name='slow'),
+    path('big-page/<int:rows>/', views.big_page, name='big_page'),
+]
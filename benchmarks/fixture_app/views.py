@@ -0,0 +1,39 @@
+from django.shortcuts import redirect, render
+
+# Number of react-select widgets on the react-select page
+REACT_SELECTS = 5
+# Elements rendered after the delay on the slow page
+SLOW_ELEMENTS = 10
+
+
+def form(request, fields: int):
+    if request.method == 'POST':
+        return redirect('submitted', fields=len(request.POST))
+    return render(request, 'fixture_app/form.html', {
+        'fields': [f'field_{index}' for index in range(fields)],
+    })
+
+
+def submitted(request, fields: int):
+    return render(request, 'fixture_app/submitted.html', {'fields': fields})
+
+
+def react_select(request, options: int):
+    return render(request, 'fixture_app/react_select.html', {
+        'selects': {
+            f'select_{index}': [f'Option {option}' for option in range(options)]
+            for index in range(REACT_SELECTS)
+        },
+    })
+
+
+def slow(request, delay: int):
+    """Page rendering its content `delay` milliseconds after loading"""
+    return render(request, 'fixture_app/slow.html', {
+        'delay': delay,
+        'elements': range(SLOW_ELEMENTS),
+    })
+
+
+def big_page(request, rows: int):
+    return render(request, 'fixture_app/big_page.html', {'rows': range(rows)})
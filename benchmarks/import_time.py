@@ -0,0 +1,101 @@
+"""Measure the cost of importing puppetmaster in a fresh interpreter.
+
+    python -m benchmarks.import_time --max-ms 50
+
+Fails when importing the package takes longer than `--max-ms` (median of
+`--runs`), or when it loads modules which should only be imported on first
+use. Django settings are left unconfigured, as in a test process collecting
+tests. The import time of puppetmaster.core with the fixture app settings is
+reported as well when Django is installed.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import typing as t
+
+PACKAGE_STATEMENT = 'import puppetmaster, puppetmaster.kobotoolbox'
+PACKAGE_MODULES = ['puppetmaster', 'puppetmaster.kobotoolbox']
+# Loaded on first use only, importing the package must not pull them in
+LAZY_MODULES = ['puppetmaster.core', 'puppetmaster.kobotoolbox.core',
+                'django.conf', 'selenium']
+CORE_STATEMENT = ("import django; django.setup(); "
+                  "import puppetmaster.core, puppetmaster.kobotoolbox.core")
+CORE_MODULES = ['puppetmaster.core', 'puppetmaster.kobotoolbox.core']
+DEFAULT_RUNS = 5
+DEFAULT_MAX_MS = 50.0
+
+
+def import_times(statement: str,
+                 env: t.Dict[str, str]) -> t.Tuple[t.Dict[str, float], t.Set[str]]:
+    """Cumulative import time in ms per module, and the modules loaded"""
+    code = f'{statement}\nimport sys\nprint("\\n".join(sys.modules))'
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, universal_newlines=True,
+                             check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times, set(process.stdout.split())
+
+
+def median_time(statement: str,
+                modules: t.List[str],
+                env: t.Dict[str, str],
+                runs: int) -> t.Tuple[float, t.Set[str]]:
+    totals = []
+    loaded: t.Set[str] = set()
+    for _ in range(runs):
+        times, loaded = import_times(statement, env)
+        totals.append(sum(times.get(module, 0.0) for module in modules))
+    return statistics.median(totals), loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.import_time')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--max-ms', type=float, default=DEFAULT_MAX_MS,
+                        help='budget for importing the package')
+    args = parser.parse_args()
+    if sys.version_info < (3, 7):
+        # -X importtime and lazy module attributes need Python 3.7
+        print('Skipped, requires Python >= 3.7')
+        return 0
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {name: value for name, value in os.environ.items()
+           if name != 'DJANGO_SETTINGS_MODULE'}
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [root, env.get('PYTHONPATH')]))
+
+    failed = False
+    package_time, loaded = median_time(PACKAGE_STATEMENT, PACKAGE_MODULES,
+                                       env, args.runs)
+    print(f'{PACKAGE_STATEMENT}: {package_time:.1f} ms '
+          f'(budget: {args.max_ms:.1f} ms)')
+    if package_time > args.max_ms:
+        print('Importing the package is over budget')
+        failed = True
+    eager = [module for module in LAZY_MODULES if module in loaded]
+    if eager:
+        print(f'Importing the package loads {", ".join(eager)}')
+        failed = True
+
+    try:
+        core_time, _ = median_time(
+            CORE_STATEMENT, CORE_MODULES,
+            dict(env, DJANGO_SETTINGS_MODULE='benchmarks.settings'), args.runs)
+    except subprocess.CalledProcessError:
+        print('puppetmaster.core: skipped, Django or selenium is not installed')
+    else:
+        print(f'puppetmaster.core, puppetmaster.kobotoolbox.core: {core_time:.1f} ms')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
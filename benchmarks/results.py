@@ -0,0 +1,72 @@
+import contextlib
+import json
+import platform
+import statistics
+import time
+import typing as t
+
+Summary = t.Dict[str, t.Dict[str, float]]
+
+# Slowdown ratio (current / baseline median) reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 1.2
+
+
+class BenchmarkResults:
+    """Durations of the benchmarked operations, in seconds"""
+
+    def __init__(self) -> None:
+        self.durations: t.Dict[str, t.List[float]] = {}
+
+    def record(self, name: str, duration: float) -> None:
+        self.durations.setdefault(name, []).append(duration)
+
+    @contextlib.contextmanager
+    def timed(self, name: str) -> t.Iterator[None]:
+        start = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - start)
+
+    def summary(self) -> Summary:
+        return {
+            name: {
+                'runs': len(durations),
+                'median': statistics.median(durations),
+                'mean': statistics.mean(durations),
+                'min': min(durations),
+                'max': max(durations),
+            }
+            for name, durations in sorted(self.durations.items())
+        }
+
+    def as_dict(self, **metadata: t.Any) -> t.Dict[str, t.Any]:
+        return {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            **metadata,
+            'results': self.summary(),
+        }
+
+    def write(self, path: str, **metadata: t.Any) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(**metadata), f, indent=2)
+
+
+def compare(baseline: Summary,
+            current: Summary,
+            threshold: float = DEFAULT_REGRESSION_THRESHOLD
+            ) -> t.List[t.Tuple[str, float]]:
+    """Return (name, slowdown ratio) of the operations which got slower
+    than `threshold` times their baseline median.
+    """
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline or not baseline[name]['median']:
+            continue
+        ratio = result['median'] / baseline[name]['median']
+        if ratio > threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+results = BenchmarkResults()
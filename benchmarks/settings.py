@@ -0,0 +1,60 @@
+import functools
+import os
+import tempfile
+
+from selenium import webdriver
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SECRET_KEY = 'benchmarks'
+DEBUG = False
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.staticfiles',
+    'benchmarks.fixture_app',
+]
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+ROOT_URLCONF = 'benchmarks.fixture_app.urls'
+
+TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'APP_DIRS': True,
+}]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+STATIC_URL = '/static/'
+
+BROWSER = os.environ.get('BENCHMARK_BROWSER', 'chrome')
+HEADLESS = os.environ.get('BENCHMARK_HEADLESS', '1') != '0'
+BROWSERS = {
+    'chrome': (webdriver.Chrome, webdriver.ChromeOptions, 'chromedriver'),
+    'firefox': (webdriver.Firefox, webdriver.FirefoxOptions, 'geckodriver'),
+}
+driver_class, options_class, default_driver_path = BROWSERS[BROWSER]
+browser_options = options_class()
+browser_options.headless = HEADLESS
+
+PM__SELENIUM_DRIVER = functools.partial(driver_class, options=browser_options)
+PM__SELENIUM_DRIVER_PATH = os.environ.get('BENCHMARK_DRIVER_PATH',
+                                          default_driver_path)
+PM__DEFAULT_SCREENSHOT_DIR = os.environ.get(
+    'BENCHMARK_SCREENSHOT_DIR', tempfile.gettempdir())
+PM__SERVICE_URL = ''
+
+# Times each benchmarked operation is repeated within a test
+BENCHMARK_REPEAT = int(os.environ.get('BENCHMARK_REPEAT', 3))
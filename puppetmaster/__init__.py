@@ -1 +1,12 @@
-from .core import SeleniumLiveServerTestCase, SeleniumTestCase  # noqa
+import sys
+
+from .lazy import lazy_attributes
+
+if sys.version_info >= (3, 7):
+    # Test cases are imported on first use, importing the package stays cheap
+    __getattr__ = lazy_attributes(__name__, {
+        'SeleniumLiveServerTestCase': '.core',
+        'SeleniumTestCase': '.core',
+    })
+else:
+    from .core import SeleniumLiveServerTestCase, SeleniumTestCase  # noqa
@@ -0,0 +1,132 @@
+import atexit
+import collections
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
+import typing as t
+
+from django.conf import settings
+
+DEFAULT_ARTIFACT_LIMIT = 50
+DEFAULT_ARTIFACT_QUEUE_SIZE = 16
+
+
+class ArtifactKinds:
+    # PNG screenshot of the viewport
+    Screenshot = 'png'
+    # Serialized DOM, much cheaper to capture under load
+    Dom = 'html'
+
+
+class ArtifactStats:
+    def __init__(self) -> None:
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    def as_dict(self) -> t.Dict[str, int]:
+        return {
+            'written': self.written,
+            'duplicates': self.duplicates,
+            'dropped': self.dropped,
+        }
+
+    def __repr__(self) -> str:
+        return f'ArtifactStats({self.as_dict()})'
+
+
+class ArtifactWriter:
+    """Writes failure artifacts from a background thread.
+
+    Artifacts identical to the previous one are skipped, and artifacts
+    submitted while the queue is full are dropped rather than blocking the
+    test. Only the last `limit` artifacts of the run are kept on disk.
+    """
+
+    def __init__(self, limit: int, queue_size: int) -> None:
+        self.limit = limit
+        self.run_id = time.strftime('%Y%m%d%H%M%S')
+        self.stats = ArtifactStats()
+        self._ids = itertools.count(0)
+        self._last_digest: t.Optional[bytes] = None
+        self._written: t.Deque[str] = collections.deque()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def filename(self,
+                 directory: str,
+                 name: str,
+                 kind: str,
+                 artifact_id: t.Optional[int] = None) -> str:
+        if artifact_id is None:
+            artifact_id = next(self._ids)
+        return os.path.join(
+            directory,
+            f'puppet_master_{self.run_id}_{os.getpid()}_{name}_{artifact_id}.{kind}')
+
+    def submit(self, filename: str, data: bytes) -> t.Optional[str]:
+        """Queue the artifact, returning its filename if it will be written"""
+        digest = hashlib.sha1(data).digest()
+        with self._lock:
+            if digest == self._last_digest:
+                self.stats.duplicates += 1
+                return None
+            try:
+                self._queue.put_nowait((filename, data))
+            except queue.Full:
+                self.stats.dropped += 1
+                return None
+            # Only a queued artifact makes identical ones duplicates
+            self._last_digest = digest
+        return filename
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            filename, data = self._queue.get()
+            try:
+                self._write(filename, data)
+            except OSError:
+                self.stats.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    def _write(self, filename: str, data: bytes) -> None:
+        with open(filename, 'wb') as f:
+            f.write(data)
+        self.stats.written += 1
+        self._written.append(filename)
+        while len(self._written) > self.limit:
+            try:
+                os.remove(self._written.popleft())
+            except OSError:
+                pass
+
+
+_writer: t.Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter(
+                getattr(settings, 'PM__ARTIFACT_LIMIT', DEFAULT_ARTIFACT_LIMIT),
+                getattr(settings, 'PM__ARTIFACT_QUEUE_SIZE',
+                        DEFAULT_ARTIFACT_QUEUE_SIZE))
+            atexit.register(_writer.flush)
+    return _writer
+
+
+def flush_artifact_writer() -> None:
+    """Wait for queued artifacts, if any artifact was submitted at all"""
+    if _writer is not None:
+        _writer.flush()
@@ -1,24 +1,123 @@
+import re
+import typing as t
+
 from selenium.common.exceptions import TimeoutException
 from .exceptions import SeleniumAssertionError
 
-from puppetmaster.waiter import WaiterInterface
+from puppetmaster.waiter import (
+    BrowserCondition,
+    CompositeCondition,
+    ConditionsTimeoutException,
+    WaiterInterface,
+    describe_composite)
+
+SearchResult = t.Tuple[t.List[str], t.Dict[str, str]]
+
+# Number of characters kept on each side of a match in page source snippets
+SNIPPET_CONTEXT = 40
+
+SEARCH_PAGE_SOURCE_SCRIPT = """
+var patterns = arguments[0], regex = arguments[1], context = arguments[2];
+var source = document.documentElement.outerHTML;
+var missing = [], snippets = {};
+patterns.forEach(function (pattern) {
+  var index = -1, length = 0;
+  if (regex) {
+    var match = new RegExp(pattern).exec(source);
+    if (match) {
+      index = match.index;
+      length = match[0].length;
+    }
+  } else {
+    index = source.indexOf(pattern);
+    length = pattern.length;
+  }
+  if (index === -1) {
+    missing.push(pattern);
+  } else {
+    snippets[pattern] = source.substring(
+      Math.max(index - context, 0), index + length + context);
+  }
+});
+return [missing, snippets];
+"""
+
+
+def search_text(source: str, patterns: t.Sequence[str], regex: bool) -> SearchResult:
+    """Python counterpart of SEARCH_PAGE_SOURCE_SCRIPT"""
+    missing = []
+    snippets = {}
+    for pattern in patterns:
+        if regex:
+            match = re.search(pattern, source)
+            span = match.span() if match else None
+        else:
+            index = source.find(pattern)
+            span = (index, index + len(pattern)) if index != -1 else None
+
+        if span is None:
+            missing.append(pattern)
+        else:
+            start, end = span
+            snippets[pattern] = source[max(start - SNIPPET_CONTEXT, 0):
+                                       end + SNIPPET_CONTEXT]
+    return missing, snippets
 
 
 class AssertionsMixin(WaiterInterface):
+    # Search the page source inside the browser instead of downloading it
+    SEARCH_PAGE_SOURCE_IN_BROWSER = False
+
     def assert_in_css_selector(self, css_selector: str, message: str) -> None:
         try:
-            self.wait(lambda driver: (
-                message in
-                driver.find_element_by_css_selector(css_selector).text
-            ))
+            self.wait(BrowserCondition(css_selector, message))
         except TimeoutException:
             raise SeleniumAssertionError(f'"{message}" not found in {css_selector}')
 
-    def assert_in_page_source(self, message: str) -> None:
+    def search_page_source(self,
+                           patterns: t.Sequence[str],
+                           regex: bool = False) -> SearchResult:
+        if self.SEARCH_PAGE_SOURCE_IN_BROWSER:
+            missing, snippets = self.driver.execute_script(
+                SEARCH_PAGE_SOURCE_SCRIPT, list(patterns), regex, SNIPPET_CONTEXT)
+            return missing, snippets
+        return search_text(self.driver.page_source, patterns, regex)
+
+    def assert_in_page_source(self,
+                              *messages: str,
+                              regex: bool = False,
+                              timeout: int = 1) -> t.Dict[str, str]:
+        """Assert all messages (or regular expressions) are in the page source.
+
+        Returns a snippet of the page source around each match.
+        """
+        result: SearchResult = (list(messages), {})
+
+        def condition(driver) -> bool:
+            nonlocal result
+            result = self.search_page_source(messages, regex)
+            return not result[0]
+
         try:
-            self.wait(lambda driver: message in driver.page_source)
+            self.wait(condition, timeout=timeout)
         except TimeoutException:
-            raise SeleniumAssertionError(f'"{message}" not found in page source.')
+            missing = ', '.join(f'"{message}"' for message in result[0])
+            raise SeleniumAssertionError(f'{missing} not found in page source.')
+        return result[1]
+
+    def assert_all(self, *conditions: CompositeCondition, timeout: int = 1) -> None:
+        """Assert all conditions hold, checking them together in each poll.
+
+        Example:
+        self.assert_all(OnPage('/forms/'),
+                        BrowserCondition('.title', 'My form'),
+                        InPageSource('Saved'))
+        """
+        try:
+            self.wait_all(*conditions, timeout=timeout)
+        except ConditionsTimeoutException as e:
+            failing = ', '.join(map(describe_composite, e.failing))
+            raise SeleniumAssertionError(f'Conditions not met: {failing}.')
 
     def assert_on_page(self, url_path: str) -> None:
         try:
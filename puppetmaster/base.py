@@ -0,0 +1,78 @@
+import typing as t
+
+from django.conf import settings
+from selenium import webdriver
+
+from .launcher import get_browser_launcher
+from .pool import get_driver_pool
+from .profiler import get_profiler
+from .proxy import get_blocking_proxy
+
+if t.TYPE_CHECKING:
+    from .http_only import HttpPage  # noqa
+
+
+class BasePuppetMaster:
+    DRIVER_WINDOW_WIDTH = 1280
+    DRIVER_WINDOW_HEIGHT = 1024
+
+    # Current page when it was fetched without a browser, see HttpOnlyMixin
+    http_page: t.Optional['HttpPage'] = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        # Test cases pass their method name on to unittest.TestCase
+        super().__init__(*args, **kwargs)  # type: ignore
+        self.driver: webdriver.Remote = None
+
+    @property
+    def server_url(self) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def launch_driver(cls) -> webdriver.Remote:
+        """Start a new browser, from the launcher's template profile if enabled"""
+        kwargs: t.Dict[str, t.Any] = {}
+        proxy = get_blocking_proxy()
+        if proxy is not None:
+            kwargs['desired_capabilities'] = proxy.capabilities(
+                settings.PM__SELENIUM_DRIVER)
+        kwargs['executable_path'] = settings.PM__SELENIUM_DRIVER_PATH
+        launcher = get_browser_launcher()
+        if launcher is None:
+            driver = settings.PM__SELENIUM_DRIVER(**kwargs)
+        else:
+            driver = launcher.launch(settings.PM__SELENIUM_DRIVER, **kwargs)
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.instrument(driver)
+        return driver
+
+    @classmethod
+    def create_driver(cls) -> webdriver.Remote:
+        launcher = get_browser_launcher()
+        if launcher is None:
+            driver = cls.launch_driver()
+        else:
+            driver = launcher.take(cls.launch_driver)
+        # XXX: Window size must be explicitly set to avoid issue where elements
+        # found in other drivers (e.g. firefox) are not visible in phantomjs.
+        # For more details see: https://github.com/ariya/phantomjs/issues/11637
+        driver.set_window_size(width=cls.DRIVER_WINDOW_WIDTH,
+                               height=cls.DRIVER_WINDOW_HEIGHT)
+        return driver
+
+    @classmethod
+    def acquire_driver(cls) -> webdriver.Remote:
+        """Check out a driver from the pool, or launch one if pooling is off"""
+        pool = get_driver_pool()
+        if pool is None:
+            return cls.create_driver()
+        return pool.acquire(cls.create_driver)
+
+    @classmethod
+    def release_driver(cls, driver: webdriver.Remote) -> None:
+        pool = get_driver_pool()
+        if pool is None:
+            driver.quit()
+        else:
+            pool.release(driver, (cls.DRIVER_WINDOW_WIDTH, cls.DRIVER_WINDOW_HEIGHT))
@@ -1,72 +1,264 @@
+import contextlib
+import copy
+import time
+import typing as t
+import unittest
+
 from django.test import TestCase, Client, modify_settings, override_settings
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.handlers import StaticFilesHandler
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from selenium import webdriver
 
 from .assertions import AssertionsMixin
+from .base import BasePuppetMaster  # noqa
 from .form_filling import FormFillingMixin
+from .http_only import HttpOnlyMixin, HttpPage
 from .middleware import AutoLoginMiddleware
+from .multi_session import (
+    SessionResult,
+    SessionsFailed,
+    run_concurrently,
+    run_session)
+from .pool import get_driver_pool
+from .profiler import get_profiler
+from .snapshots import (
+    SeedTimings,
+    create_snapshot,
+    database_snapshots,
+    seed_timings,
+    snapshots_lock)
+from .static import CachedStaticFilesHandler, static_index
+from .timings import get_timing_recorder, test_class_id
 from .waiter import WaiterMixin
 
 
-class BasePuppetMaster:
-    DRIVER_WINDOW_WIDTH = 1280
-    DRIVER_WINDOW_HEIGHT = 1024
-
-    def __init__(self) -> None:
-        self.driver: webdriver.Remote = None
-
-    @property
-    def server_url(self) -> str:
-        raise NotImplementedError
-
-    @classmethod
-    def create_driver(cls) -> webdriver.Remote:
-        driver = settings.PM__SELENIUM_DRIVER(
-            executable_path=settings.PM__SELENIUM_DRIVER_PATH)
-        # XXX: Window size must be explicitly set to avoid issue where elements
-        # found in other drivers (e.g. firefox) are not visible in phantomjs.
-        # For more details see: https://github.com/ariya/phantomjs/issues/11637
-        driver.set_window_size(width=cls.DRIVER_WINDOW_WIDTH,
-                               height=cls.DRIVER_WINDOW_HEIGHT)
-        return driver
-
-
 class SeleniumTestsMixin(WaiterMixin,
+                         HttpOnlyMixin,
                          AssertionsMixin,
                          FormFillingMixin):
     """Common class for Selenium tests"""
     should_login_automatically = True
     starting_url = '/'
+    _driver: t.Optional[webdriver.Remote] = None
+    # Durations of the mixin's setUp and tearDown, see `run`
+    _phase_times: t.Optional[t.Dict[str, float]] = None
+
+    @property  # type: ignore
+    def driver(self) -> webdriver.Remote:
+        if self._driver is None and self.http_page is not None:
+            self.start_browser()
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver: webdriver.Remote) -> None:
+        self._driver = driver
+
+    def start_browser(self) -> None:
+        """Continue an HTTP_FAST_PATH test in a browser from the current page"""
+        page, self.http_page = self.http_page, None
+        assert page is not None
+        driver = self.acquire_driver()
+        self._driver = driver
+        driver.get(page.url)
+        if self.client.cookies:
+            for morsel in self.client.cookies.values():
+                driver.add_cookie({
+                    'name': morsel.key, 'value': morsel.value, 'path': '/'})
+            driver.get(page.url)
+        self.initial_window = driver.window_handles[0]
 
     def login_automatically(self) -> None:
         raise NotImplementedError
 
+    @classmethod
+    def setUpClass(cls) -> None:
+        start = time.perf_counter()
+        super().setUpClass()  # type: ignore
+        recorder = get_timing_recorder()
+        if recorder is not None:
+            recorder.record_class(test_class_id(cls), 'setup',
+                                  time.perf_counter() - start)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        start = time.perf_counter()
+        super().tearDownClass()  # type: ignore
+        recorder = get_timing_recorder()
+        if recorder is not None:
+            recorder.record_class(test_class_id(cls), 'teardown',
+                                  time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def timed_phase(self, phase: str) -> t.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._phase_times is not None:
+                self._phase_times[phase] = time.perf_counter() - start
+
+    def run(self, result: t.Optional[unittest.TestResult] = None
+            ) -> t.Optional[unittest.TestResult]:
+        """Run the test, recording setUp, body and tearDown times.
+
+        The body is what remains of the test's run besides the mixin's own
+        setUp and tearDown, so it includes work a subclass adds around them.
+        """
+        phase_times: t.Dict[str, float] = {}
+        self._phase_times = phase_times
+        start = time.perf_counter()
+        try:
+            return super().run(result)  # type: ignore
+        finally:
+            total = time.perf_counter() - start
+            recorder = get_timing_recorder()
+            if recorder is not None:
+                test_id = self.id()  # type: ignore
+                for phase, duration in phase_times.items():
+                    recorder.record_test(test_id, phase, duration)
+                recorder.record_test(test_id, 'body',
+                                     max(total - sum(phase_times.values()), 0.0))
+
     def setUp(self) -> None:
-        self.driver = self.create_driver()
-        self.client = Client()
+        with self.timed_phase('setup'):
+            profiler = get_profiler()
+            if profiler is not None:
+                profiler.start_test(self.id())  # type: ignore
 
-        if self.should_login_automatically:
-            self.login_automatically()
+            self.client = Client()
+            if self.HTTP_FAST_PATH:
+                # The browser is only started once something needs it
+                self.http_page = HttpPage(self.server_url + self.starting_url)
+            else:
+                self.driver = self.acquire_driver()
+            self.restore_seed_database()
 
-        assert len(self.driver.window_handles) > 0, "No window handles!"
-        self.initiate_database()
-        self.initial_window = self.driver.window_handles[0]
-        self.driver.get(self.server_url + self.starting_url)
+            if self.should_login_automatically:
+                self.login_automatically()
+
+            self.initiate_database()
+            if self.http_page is None:
+                assert len(self.driver.window_handles) > 0, "No window handles!"
+                self.initial_window = self.driver.window_handles[0]
+            self.open_page(self.starting_url)
 
     def tearDown(self) -> None:
-        if isinstance(self.driver, webdriver.Chrome):
-            # XXX: fix broken pipe when re-using chrome instance between tests
-            # without this code, first test executes and next one hangs
-            self.driver.execute_script('location.reload()')
-            self.driver.quit()
+        with self.timed_phase('teardown'):
+            self.http_page = None
+            if self._driver is None:
+                return
+            if get_driver_pool() is not None:
+                self.release_driver(self.driver)
+            elif isinstance(self.driver, webdriver.Chrome):
+                # XXX: fix broken pipe when re-using chrome instance between
+                # tests without this code, first test executes and next one hangs
+                self.driver.execute_script('location.reload()')
+                self.driver.quit()
 
     def initiate_database(self) -> None:
         # Override and initiate database with data here
         pass
 
+    def seed_database(self) -> None:
+        # Override and create data shared by all tests of the class here. It is
+        # created once and restored from a database snapshot before each test.
+        pass
+
+    def restore_seed_database(self) -> None:
+        """Seed the database on the first test of the class, restore the
+        snapshot taken after seeding on the following ones.
+        """
+        if type(self).seed_database is SeleniumTestsMixin.seed_database:
+            return
+
+        key = f'{type(self).__module__}.{type(self).__qualname__}'
+        with snapshots_lock:
+            snapshot = database_snapshots.get(key)
+            timings = seed_timings.setdefault(key, SeedTimings())
+
+        start = time.perf_counter()
+        if snapshot is None:
+            self.seed_database()
+            snapshot = create_snapshot()
+            snapshot.capture()
+            with snapshots_lock:
+                database_snapshots[key] = snapshot
+            self.seed_database_time = time.perf_counter() - start
+            timings.seeds += 1
+            timings.seed_time += self.seed_database_time
+        else:
+            snapshot.restore()
+            self.seed_database_time = time.perf_counter() - start
+            timings.restores += 1
+            timings.restore_time += self.seed_database_time
+
+    def log_in_session(self, session: t.Any, user: t.Any) -> None:
+        """Log the browser of a session started by `browser_sessions` in"""
+        raise NotImplementedError
+
+    def open_session(self, user: t.Any) -> t.Any:
+        session: t.Any = copy.copy(self)
+        session.http_page = None
+        session.driver = self.acquire_driver()
+        session.user = user
+        session.initial_window = session.driver.window_handles[0]
+        try:
+            self.log_in_session(session, user)
+            session.open_page(self.starting_url)
+        except Exception:
+            self.release_driver(session.driver)
+            raise
+        return session
+
+    @contextlib.contextmanager
+    def browser_sessions(self, users: t.Sequence[t.Any]) -> t.Iterator[t.List[t.Any]]:
+        """Start a browser logged in as each of the users, all at once.
+
+        Sessions are copies of the test with their own `driver` and `user`, so
+        every helper works on them. Drivers come from the pool (or launcher)
+        and are released when the block exits.
+
+        Example:
+        with self.browser_sessions([alice, bob]) as sessions:
+            results = self.run_in_sessions(sessions, lambda session: ...)
+        """
+        def open_session(user: t.Any) -> t.Any:
+            try:
+                return self.open_session(user)
+            except Exception as e:
+                return e
+
+        opened = run_concurrently(open_session, list(users))
+        sessions = [session for session in opened
+                    if not isinstance(session, Exception)]
+        try:
+            errors = [session for session in opened if isinstance(session, Exception)]
+            if errors:
+                raise errors[0]
+            yield sessions
+        finally:
+            run_concurrently(lambda session: self.release_driver(session.driver),
+                             sessions)
+
+    def run_in_sessions(self,
+                        sessions: t.Sequence[t.Any],
+                        script: t.Callable[[t.Any], t.Any],
+                        raise_errors: bool = True) -> t.List[SessionResult]:
+        """Run the script on every session concurrently.
+
+        A failing session gets a screenshot, and unless `raise_errors` is
+        off SessionsFailed is raised once all sessions are done.
+        """
+        results = run_concurrently(
+            lambda item: run_session(item[0], item[1], script),
+            list(enumerate(sessions)))
+        if raise_errors and any(result.failed for result in results):
+            raise SessionsFailed(results)
+        return results
+
     def switch_to_next_window(self) -> None:
         """Switch Selenium focus to next window (browser tab)"""
         next_window = next(filter(lambda h: h != self.initial_window,
@@ -100,6 +292,18 @@ class SeleniumTestCase(SeleniumTestsMixin, TestCase):
     }
 })
 class SeleniumLiveServerTestCase(SeleniumTestsMixin, StaticLiveServerTestCase):
+    # Serve static files from an in-memory, precompressed index, see static.py
+    CACHE_STATIC_FILES = False
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        if cls.CACHE_STATIC_FILES:
+            static_index.build()
+            cls.static_handler = CachedStaticFilesHandler
+        else:
+            cls.static_handler = StaticFilesHandler
+        super().setUpClass()
+
     @property
     def server_url(self):
         return self.live_server_url
@@ -114,7 +318,13 @@ class SeleniumLiveServerTestCase(SeleniumTestsMixin, StaticLiveServerTestCase):
     def login_automatically(self) -> None:
         self.user = self.create_user()
         self.verify_email(self.user)
-        if self.login_automatically:
-            AutoLoginMiddleware.user = self.user
-        else:
-            AutoLoginMiddleware.user = None
+        AutoLoginMiddleware.user = self.user
+
+    def log_in_session(self, session: t.Any, user: t.Any) -> None:
+        # XXX: Cookies can only be set for the domain of the current page
+        session.driver.get(self.server_url + self.starting_url)
+        session.driver.add_cookie(AutoLoginMiddleware.user_cookie(user))
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        AutoLoginMiddleware.reset()
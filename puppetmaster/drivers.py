@@ -0,0 +1,26 @@
+import functools
+import typing as t
+
+from selenium import webdriver
+
+
+class Browsers:
+    Chrome = 'chrome'
+    Firefox = 'firefox'
+
+
+def driver_class(driver: t.Callable[..., webdriver.Remote]) -> t.Optional[type]:
+    """Class of PM__SELENIUM_DRIVER, which may be wrapped in functools.partial"""
+    while isinstance(driver, functools.partial):
+        driver = driver.func
+    return driver if isinstance(driver, type) else None
+
+
+def browser_name(driver: t.Callable[..., webdriver.Remote]) -> t.Optional[str]:
+    """Browser started by the driver class, None if not Chrome or Firefox"""
+    cls = driver_class(driver)
+    if cls is not None and issubclass(cls, webdriver.Chrome):
+        return Browsers.Chrome
+    if cls is not None and issubclass(cls, webdriver.Firefox):
+        return Browsers.Firefox
+    return None
@@ -1,3 +1,4 @@
+import time
 import typing as t
 from datetime import datetime
 
@@ -11,11 +12,115 @@ from selenium.webdriver.support import expected_conditions as EC
 
 from .waiter import WaiterInterface
 from .exceptions import MissingDataException
+from .form_schema import (
+    FORM_SNAPSHOT_SCRIPT,
+    FormField,
+    FormSchema,
+    form_schema_cache)
 
 
 InputType = str
 InputValue = t.Union[int, str, float, t.Tuple[InputType, t.Any]]
 
+INPUTS_SELECTOR = 'input:not(.hidden):not([type="hidden"]):not([type="submit"])'
+TEXTAREAS_SELECTOR = 'textarea:not(.hidden):not([type="hidden"])'
+FORM_FIELDS_SELECTOR = f'{INPUTS_SELECTOR}, {TEXTAREAS_SELECTOR}'
+
+COLLECT_FORM_FIELDS_SCRIPT = """
+var fields = arguments[0].querySelectorAll(arguments[1]);
+return Array.prototype.map.call(fields, function (el) {
+  var style = window.getComputedStyle(el);
+  return {
+    element: el,
+    name: el.getAttribute('name') || '',
+    type: el.type || '',
+    visible: el.getClientRects().length > 0 && style.visibility !== 'hidden',
+    editable: !el.disabled && !el.readOnly
+  };
+});
+"""
+
+FILL_FORM_FIELDS_SCRIPT = """
+arguments[0].forEach(function (field) {
+  var el = field[0], inputType = field[1], value = field[2];
+  if (inputType === 'Checkbox') {
+    if (value.map(String).indexOf(el.value) !== -1 && !el.checked) {
+      el.click();
+    }
+    return;
+  }
+  // Use the native setter, so frameworks tracking the value notice the change
+  var prototype = Object.getPrototypeOf(el);
+  Object.getOwnPropertyDescriptor(prototype, 'value').set.call(el, value);
+  el.dispatchEvent(new Event('input', {bubbles: true}));
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+});
+"""
+
+# React handles these synthetic events synchronously, so the menu state is
+# already updated in the DOM when dispatchEvent returns.
+SELECT_REACT_OPTIONS_SCRIPT = """
+var selects = arguments[0], data = arguments[1], useFilter = arguments[2];
+
+function mouseDown(el) {
+  el.dispatchEvent(new MouseEvent('mousedown', {
+    bubbles: true, cancelable: true, button: 0
+  }));
+}
+
+function openMenu(select) {
+  if (!select.querySelector('.Select-menu-outer')) {
+    mouseDown(select.querySelector('.Select-arrow, .Select-control'));
+  }
+  return Array.prototype.slice.call(select.querySelectorAll('.Select-option'));
+}
+
+function fieldName(select) {
+  var hidden = select.querySelector('input[type="hidden"]');
+  return hidden ? hidden.name : null;
+}
+
+function typeFilter(select, text) {
+  var input = select.querySelector('.Select-input input');
+  if (input) {
+    var descriptor = Object.getOwnPropertyDescriptor(
+      HTMLInputElement.prototype, 'value');
+    descriptor.set.call(input, text);
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+  }
+}
+
+return selects.map(function (select) {
+  var name = fieldName(select);
+  if (!name) {
+    // The hidden input holding the name is only rendered once a value is set
+    var first = openMenu(select)[0];
+    if (!first) {
+      return [null, 'empty'];
+    }
+    mouseDown(first);
+    name = fieldName(select);
+  }
+  if (!(name in data)) {
+    return [name, 'missing'];
+  }
+
+  var label = String(data[name]);
+  openMenu(select);
+  if (useFilter) {
+    typeFilter(select, label);
+  }
+  var option = openMenu(select).filter(function (el) {
+    return (el.innerText || el.textContent).trim() === label;
+  })[0];
+  if (!option) {
+    return [name, 'not_found'];
+  }
+  mouseDown(option);
+  return [name, 'selected'];
+});
+"""
+
 
 class InputTypes:
     Default = 'Default'
@@ -25,6 +130,14 @@ class InputTypes:
     Time = 'Time'
 
 
+class FillModes:
+    # One WebDriver round trip per field operation
+    Default = 'default'
+    # Discover and fill all fields in two `execute_script` calls, widgets
+    # needing keystrokes fall back to the default path
+    Batched = 'batched'
+
+
 class FormFillingInterface(WaiterInterface):
     def fill_input_with_value(self, input_el: WebElement, value: InputValue) -> None:
         raise NotImplementedError
@@ -41,11 +154,21 @@ class FormFillingInterface(WaiterInterface):
     def submit_form(self, form: WebElement):
         raise NotImplementedError
 
-    def fill_form_and_submit(self, form_selector: str, **data: InputValue):
+    def fill_form_and_submit(self,
+                             form_selector: str,
+                             *,
+                             _fill_mode: t.Optional[str] = None,
+                             **data: InputValue):
         raise NotImplementedError
 
 
 class FormFillingMixin(FormFillingInterface):
+    FORM_FILL_MODE = FillModes.Default
+    # Reuse field names and types discovered on earlier fills of the same form
+    CACHE_FORM_SCHEMA = False
+    # Input types which cannot be filled by setting the value from JavaScript
+    KEYSTROKE_INPUT_TYPES = ('file',)
+
     @staticmethod
     def fill_input_with_value(input_el: WebElement, value: InputValue) -> None:
         try:
@@ -57,20 +180,30 @@ class FormFillingMixin(FormFillingInterface):
 
     @staticmethod
     def get_input_name(input_el: WebElement) -> str:
-        return input_el.get_attribute('name').split('.')[-1].split('/')[-1]
+        return FormFillingMixin.parse_input_name(input_el.get_attribute('name'))
+
+    @staticmethod
+    def parse_input_name(name: str) -> str:
+        return name.split('.')[-1].split('/')[-1]
 
     @staticmethod
     def is_valid_date(value: InputValue) -> bool:
         try:
-            datetime.strptime("2019-12-12", "%Y-%m-%d")
+            datetime.strptime(str(value), "%Y-%m-%d")
             return True
         except ValueError:
             return False
 
-    def get_value_with_type(self,
-                            input_el: WebElement,
-                            **data: InputValue) -> t.Tuple[InputValue, InputType]:
-        input_name = self.get_input_name(input_el)
+    def resolve_value_with_type(
+            self,
+            input_name: str,
+            get_input_type: t.Callable[[], str],
+            **data: InputValue) -> t.Tuple[InputValue, InputType]:
+        """Pick the value for the named input and decide how to fill it.
+
+        `get_input_type` is only called when the value alone is not enough,
+        so that callers can fetch the input type lazily.
+        """
         try:
             datum = data[input_name]
         except KeyError:
@@ -80,17 +213,27 @@ class FormFillingMixin(FormFillingInterface):
         if type(datum) == tuple:
             el_type, value = datum  # type: ignore
         # TODO: this regex should be more flexible / defined in settings
-        elif self.is_valid_date(value):
-            el_type, value = InputTypes.Date, value
-        elif input_el.get_attribute('type') in ['radio', 'checkbox']:
-            el_type, value = InputTypes.Checkbox, [value]
+        elif self.is_valid_date(datum):
+            el_type, value = InputTypes.Date, datum
+        elif get_input_type() in ['radio', 'checkbox']:
+            el_type, value = InputTypes.Checkbox, [datum]
         else:
             value = datum
             el_type = InputTypes.Default
         return value, el_type
 
-    def fill_input(self, input_el: WebElement, **data: InputValue) -> None:
-        value, el_type = self.get_value_with_type(input_el, **data)
+    def get_value_with_type(self,
+                            input_el: WebElement,
+                            **data: InputValue) -> t.Tuple[InputValue, InputType]:
+        return self.resolve_value_with_type(
+            self.get_input_name(input_el),
+            lambda: input_el.get_attribute('type'),
+            **data)
+
+    def fill_input_with_type(self,
+                             input_el: WebElement,
+                             value: InputValue,
+                             el_type: InputType) -> None:
         fill_input_map = {
             InputTypes.Date: self.fill_date_input,
             InputTypes.Default: self.fill_input_with_value,
@@ -99,6 +242,10 @@ class FormFillingMixin(FormFillingInterface):
         }
         fill_input_map[el_type](input_el, value)
 
+    def fill_input(self, input_el: WebElement, **data: InputValue) -> None:
+        value, el_type = self.get_value_with_type(input_el, **data)
+        self.fill_input_with_type(input_el, value, el_type)
+
     def iterate_react_select_options(self, select: WebElement) -> t.List[WebElement]:
         """Given a .Select rendered by react-select, return an iterable
         of .Select-option that can be .click()-ed to select them.
@@ -108,26 +255,40 @@ class FormFillingMixin(FormFillingInterface):
         self.wait(EC.element_to_be_clickable((By.CLASS_NAME, 'Select-option')))
         return select.find_elements_by_class_name('Select-option')
 
-    def react_select_option(self, select: WebElement, **data: InputValue) -> None:
+    def react_select_options(self,
+                             selects: t.Sequence[WebElement],
+                             *,
+                             _use_filter: bool = False,
+                             **data: InputValue) -> None:
+        """Given several .Select rendered by react-select, select an option
+        by label in each of them with a single script call.
+
+        With `_use_filter` the label is typed into the select first, for
+        selects which only render options matching the filter. It is
+        underscored so it cannot clash with a field name.
+        """
+        # XXX: The script still has to select some option first to know the
+        # name of the field, it is not in the DOM if nothing is selected
+        results = self.driver.execute_script(
+            SELECT_REACT_OPTIONS_SCRIPT, list(selects), data, _use_filter)
+        for select_name, status in results:
+            if status == 'empty':
+                raise MissingDataException('Empty select box encountered.')
+            if status == 'missing':
+                raise MissingDataException(f"Form is missing '{select_name}' "
+                                           f"select in {data}")
+            if status == 'not_found':
+                raise MissingDataException('Option not found.')
+
+    def react_select_option(self,
+                            select: WebElement,
+                            *,
+                            _use_filter: bool = False,
+                            **data: InputValue) -> None:
         """Given a .Select rendered by react-select, select an option
         by label.
         """
-        # XXX: Have to first select some element to know the name of the field,
-        # it is not possible to know it from the DOM if nothing is selected
-        for option in self.iterate_react_select_options(select):
-            option.click()
-            break
-        else:
-            raise MissingDataException('Empty select box encountered.')
-        select_name = select \
-            .find_element_by_css_selector('input[type="hidden"]') \
-            .get_attribute('name')
-        for option in self.iterate_react_select_options(select):
-            if option.text == data[select_name]:
-                option.click()
-                break
-        else:
-            raise MissingDataException('Option not found.')
+        self.react_select_options([select], _use_filter=_use_filter, **data)
 
     def fill_checkbox(self, input_el: WebElement, values) -> None:
         """Select checkbox in case it is required or uncheck otherwise"""
@@ -148,36 +309,130 @@ class FormFillingMixin(FormFillingInterface):
         ActionChains(driver).send_keys(Keys.ARROW_DOWN).perform()
 
     def get_form_inputs(self, form: WebElement) -> t.Iterable[WebElement]:
-        inputs_selector = ('input:not(.hidden):not([type="hidden"])'
-                           ':not([type="submit"])')
         return filter(
             self.get_input_name,
-            form.find_elements_by_css_selector(inputs_selector))
+            form.find_elements_by_css_selector(INPUTS_SELECTOR))
 
     def get_form_textareas(self, form: WebElement) -> t.Iterable[WebElement]:
-        selector = 'textarea:not(.hidden):not([type="hidden"])'
         return filter(
             self.get_input_name,
-            form.find_elements_by_css_selector(selector))
+            form.find_elements_by_css_selector(TEXTAREAS_SELECTOR))
+
+    def fill_form(self,
+                  form: WebElement,
+                  *,
+                  _fill_mode: t.Optional[str] = None,
+                  **data: InputValue) -> None:
+        # The fill mode is underscored so it cannot clash with a field name
+        if (_fill_mode or self.FORM_FILL_MODE) == FillModes.Batched:
+            self.fill_form_batched(form, **data)
+            return
 
-    def fill_form(self, form: WebElement, **data: InputValue) -> None:
         for form_input in self.get_form_inputs(form):
             self.fill_input(form_input, **data)
 
         for textarea in self.get_form_textareas(form):
             self.fill_input(textarea, **data)
 
+    def can_fill_with_script(self,
+                             field: t.Dict[str, t.Any],
+                             el_type: InputType) -> bool:
+        return (el_type in [InputTypes.Default, InputTypes.Checkbox]
+                and field['visible'] and field['editable']
+                and field['type'] not in self.KEYSTROKE_INPUT_TYPES)
+
+    def fill_form_batched(self, form: WebElement, **data: InputValue) -> None:
+        """Fill the form using two `execute_script` calls.
+
+        Fields that cannot be filled from JavaScript (dates, times, hidden or
+        read-only inputs, file uploads) are filled one by one afterwards.
+        """
+        fields = self.driver.execute_script(
+            COLLECT_FORM_FIELDS_SCRIPT, form, FORM_FIELDS_SELECTOR)
+
+        batch = []
+        fallback = []
+        for field in fields:
+            input_name = self.parse_input_name(field['name'])
+            if not input_name:
+                continue
+            value, el_type = self.resolve_value_with_type(
+                input_name, lambda: field['type'], **data)
+            if not self.can_fill_with_script(field, el_type):
+                fallback.append((field['element'], value, el_type))
+            elif el_type == InputTypes.Checkbox:
+                batch.append([field['element'], el_type, value])
+            else:
+                batch.append([field['element'], el_type, str(value)])
+
+        if batch:
+            self.driver.execute_script(FILL_FORM_FIELDS_SCRIPT, batch)
+        for input_el, value, el_type in fallback:
+            self.fill_input_with_type(input_el, value, el_type)
+
+    def discover_form_schema(self,
+                             fields: t.List[t.Dict[str, str]],
+                             fingerprint: str) -> FormSchema:
+        """Build the schema from the names and types read by
+        FORM_SNAPSHOT_SCRIPT, without further WebDriver calls.
+        """
+        schema_fields = []
+        for index, field in enumerate(fields):
+            input_name = self.parse_input_name(field['name'])
+            if input_name:
+                schema_fields.append(FormField(input_name, field['type'], index))
+        return FormSchema(fingerprint, schema_fields)
+
+    def get_form_schema(
+            self,
+            form: WebElement,
+            form_selector: str) -> t.Tuple[FormSchema, t.List[WebElement]]:
+        """Return the form schema and the form field elements it indexes.
+
+        Fields are only read and discovered again when the form fingerprint
+        changed.
+        """
+        start = time.perf_counter()
+        snapshot = self.driver.execute_script(
+            FORM_SNAPSHOT_SCRIPT, form, FORM_FIELDS_SELECTOR,
+            form_schema_cache.fingerprints(form_selector))
+        key = (snapshot['path'], form_selector)
+        schema = form_schema_cache.get(key, snapshot['fingerprint'],
+                                       time.perf_counter() - start)
+        if schema is None:
+            if snapshot['fields'] is None:
+                # The schema was dropped since the fingerprints were read
+                snapshot = self.driver.execute_script(
+                    FORM_SNAPSHOT_SCRIPT, form, FORM_FIELDS_SELECTOR, {})
+            schema = self.discover_form_schema(snapshot['fields'],
+                                               snapshot['fingerprint'])
+            form_schema_cache.store(key, schema, time.perf_counter() - start)
+        return schema, snapshot['elements']
+
+    def fill_form_with_schema(self,
+                              form: WebElement,
+                              form_selector: str,
+                              **data: InputValue) -> None:
+        schema, elements = self.get_form_schema(form, form_selector)
+        for field in schema.fields:
+            value, el_type = self.resolve_value_with_type(
+                field.name, lambda: field.input_type, **data)
+            self.fill_input_with_type(elements[field.position], value, el_type)
+
     def submit_form(self, form: WebElement) -> None:
         submit_selector = 'button[type="submit"], input[type="submit"]'
         form.find_element_by_css_selector(submit_selector).click()
 
     def fill_form_and_submit(self,
                              form_selector: str,
+                             *,
+                             _fill_mode: t.Optional[str] = None,
                              **data: InputValue) -> None:
         """Uniform method filling and submitting form.
 
         Example parameters:
         form_selector = '#data-form'
+        _fill_mode = FillModes.Batched  # defaults to FORM_FILL_MODE
         data = {
             'name': 'Name',
             'phone': 123456789,
@@ -185,5 +440,9 @@ class FormFillingMixin(FormFillingInterface):
         }
         """
         form = self.wait_for_element(form_selector)
-        self.fill_form(form, **data)
+        batched = (_fill_mode or self.FORM_FILL_MODE) == FillModes.Batched
+        if self.CACHE_FORM_SCHEMA and not batched:
+            self.fill_form_with_schema(form, form_selector, **data)
+        else:
+            self.fill_form(form, _fill_mode=_fill_mode, **data)
         self.submit_form(form)
@@ -0,0 +1,124 @@
+import threading
+import typing as t
+
+SchemaKey = t.Tuple[str, str]
+
+# Fields are only read and returned when the fingerprint differs from the
+# one cached for the page (arguments[2], fingerprints by URL path)
+FORM_SNAPSHOT_SCRIPT = """
+var fields = arguments[0].querySelectorAll(arguments[1]);
+var signature = '';
+for (var i = 0; i < fields.length; i++) {
+  signature += fields[i].tagName + ':' + fields[i].getAttribute('name') + ':'
+    + fields[i].type + '|';
+}
+var hash = 5381;
+for (var j = 0; j < signature.length; j++) {
+  hash = ((hash << 5) + hash + signature.charCodeAt(j)) | 0;
+}
+var fingerprint = fields.length + '-' + (hash >>> 0).toString(16);
+var schema = null;
+if (arguments[2][window.location.pathname] !== fingerprint) {
+  schema = Array.prototype.map.call(fields, function (el) {
+    return {name: el.getAttribute('name') || '', type: el.type || ''};
+  });
+}
+return {
+  path: window.location.pathname,
+  fingerprint: fingerprint,
+  fields: schema,
+  elements: Array.prototype.slice.call(fields)
+};
+"""
+
+
+class FormField(t.NamedTuple):
+    name: str
+    input_type: str
+    # Position among the elements matched by the form fields selector
+    position: int
+
+
+class FormSchema(t.NamedTuple):
+    fingerprint: str
+    fields: t.List[FormField]
+
+
+class FormSchemaCacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Time of the snapshots which returned the fields, and of those
+        # which did not
+        self.discovery_time = 0.0
+        self.hit_time = 0.0
+
+    @property
+    def saved_time(self) -> float:
+        """Estimated discovery time saved by hits, in seconds"""
+        if not self.misses:
+            return 0.0
+        return max(self.hits * self.discovery_time / self.misses - self.hit_time, 0.0)
+
+    def as_dict(self) -> t.Dict[str, float]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'discovery_time': self.discovery_time,
+            'hit_time': self.hit_time,
+            'saved_time': self.saved_time,
+        }
+
+    def __repr__(self) -> str:
+        return f'FormSchemaCacheStats({self.as_dict()})'
+
+
+class FormSchemaCache:
+    """Form schemas keyed by (URL path, form selector).
+
+    A cached schema is only returned while the DOM fingerprint of the form
+    matches the one it was discovered with. The fingerprints are passed to
+    FORM_SNAPSHOT_SCRIPT, which then skips reading the fields.
+    """
+
+    def __init__(self) -> None:
+        self.stats = FormSchemaCacheStats()
+        self._schemas: t.Dict[SchemaKey, FormSchema] = {}
+        self._lock = threading.Lock()
+
+    def fingerprints(self, form_selector: str) -> t.Dict[str, str]:
+        """Fingerprints of the cached schemas of the form by URL path"""
+        with self._lock:
+            return {path: schema.fingerprint
+                    for (path, selector), schema in self._schemas.items()
+                    if selector == form_selector}
+
+    def get(self,
+            key: SchemaKey,
+            fingerprint: str,
+            lookup_time: float = 0.0) -> t.Optional[FormSchema]:
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is not None and schema.fingerprint == fingerprint:
+                self.stats.hits += 1
+                self.stats.hit_time += lookup_time
+                return schema
+            if schema is not None:
+                self.stats.invalidations += 1
+                del self._schemas[key]
+            self.stats.misses += 1
+            return None
+
+    def store(self, key: SchemaKey, schema: FormSchema, discovery_time: float) -> None:
+        with self._lock:
+            self._schemas[key] = schema
+            self.stats.discovery_time += discovery_time
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+
+
+form_schema_cache = FormSchemaCache()
@@ -0,0 +1,213 @@
+import typing as t
+from urllib.parse import urljoin, urlsplit
+
+from django.test import Client
+
+from .assertions import AssertionsMixin, search_text
+from .waiter import (
+    BrowserCondition,
+    CompositeCondition,
+    InPageSource,
+    OnPage,
+    describe_composite)
+from .exceptions import (
+    MissingDataException,
+    PuppetMasterException,
+    SeleniumAssertionError)
+from .form_filling import FORM_FIELDS_SELECTOR, FormFillingMixin, InputValue
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None  # type: ignore
+
+FormData = t.Dict[str, t.List[str]]
+
+# Input types which never end up in submitted form data
+NOT_SUBMITTED_INPUT_TYPES = ('submit', 'button', 'image', 'reset', 'file')
+
+
+def path_of(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+class HttpPage:
+    """Server-rendered page fetched with the Django test client"""
+
+    def __init__(self, url: str, content: str = '', status_code: int = 0) -> None:
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self._soup = None
+
+    @property
+    def soup(self):
+        if BeautifulSoup is None:
+            raise PuppetMasterException(
+                'HTTP_FAST_PATH requires beautifulsoup4, '
+                'install puppet-master[http].')
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.content, 'html.parser')
+        return self._soup
+
+    def select_text(self, css_selector: str) -> t.Optional[str]:
+        element = self.soup.select_one(css_selector)
+        return element.get_text() if element is not None else None
+
+    def form_submission(self,
+                        form_selector: str,
+                        **data: InputValue) -> t.Tuple[str, str, FormData]:
+        """Return method, URL and data the browser would submit for the form.
+
+        Like FormFillingMixin.fill_form, every visible input and textarea needs
+        a value in `data`, other fields keep their rendered values.
+        """
+        form = self.soup.select_one(form_selector)
+        if form is None:
+            raise SeleniumAssertionError(f'Form {form_selector} not found.')
+
+        required = set(map(id, form.select(FORM_FIELDS_SELECTOR)))
+        form_data: FormData = {}
+        for field in form.select('input[name], textarea[name], select[name]'):
+            if field.has_attr('disabled'):
+                continue
+            name = field['name']
+            short_name = FormFillingMixin.parse_input_name(name)
+            if short_name in data:
+                value: t.Any = data[short_name]
+                value = value[1] if isinstance(value, tuple) else value
+            elif id(field) in required:
+                raise MissingDataException(f"Form is missing '{short_name}' "
+                                           f"input in {data}")
+            else:
+                value = None
+            for submitted in self.field_values(field, value):
+                form_data.setdefault(name, []).append(submitted)
+
+        method = form.get('method', 'get').lower()
+        url = urljoin(self.url, form.get('action') or self.url)
+        return method, url, form_data
+
+    @staticmethod
+    def field_values(field, value: t.Any) -> t.List[str]:
+        """Values submitted for a field, given the value filled in (or None)"""
+        field_type = field.get('type', 'text').lower()
+        if field.name == 'input' and field_type in NOT_SUBMITTED_INPUT_TYPES:
+            return []
+        if field.name == 'input' and field_type in ['radio', 'checkbox']:
+            field_value = field.get('value', 'on')
+            values = value if isinstance(value, list) else [value]
+            selected = value is not None and field_value in map(str, values)
+            # Filling never unchecks checkboxes, but picks a different radio
+            if field_type == 'checkbox' or value is None:
+                selected = selected or field.has_attr('checked')
+            return [field_value] if selected else []
+        if value is not None:
+            return [str(value)]
+        if field.name == 'textarea':
+            return [field.get_text()]
+        if field.name == 'select':
+            options = (field.select('option[selected]')
+                       or field.select('option')[:1])
+            return [option.get('value', option.get_text()) for option in options]
+        return [field.get('value', '')]
+
+
+class HttpOnlyMixin(AssertionsMixin, FormFillingMixin):
+    """Serve server-rendered pages through the Django test client.
+
+    With HTTP_FAST_PATH enabled, pages are fetched in-process and
+    `assert_on_page`, `assert_in_css_selector`, `assert_in_page_source` and
+    `fill_form_and_submit` work on the parsed HTML. The browser is only
+    started when something accesses `self.driver`, and continues from the
+    current page with the client's cookies.
+    """
+    HTTP_FAST_PATH = False
+    client: Client
+
+    def http_request(self,
+                     method: str,
+                     url: str,
+                     data: t.Optional[FormData] = None) -> HttpPage:
+        response = getattr(self.client, method)(path_of(url), data or {},
+                                                follow=True)
+        for location, _ in response.redirect_chain:
+            url = self.server_url + path_of(urljoin(url, location))
+        return HttpPage(url,
+                        response.content.decode(response.charset or 'utf-8'),
+                        response.status_code)
+
+    def open_page(self, url_path: str) -> None:
+        if self.http_page is None:
+            self.driver.get(self.server_url + url_path)
+        else:
+            self.http_page = self.http_request('get', self.server_url + url_path)
+
+    def assert_in_css_selector(self, css_selector: str, message: str) -> None:
+        if self.http_page is None:
+            return super().assert_in_css_selector(css_selector, message)
+        text = self.http_page.select_text(css_selector)
+        if text is None or message not in text:
+            raise SeleniumAssertionError(f'"{message}" not found in {css_selector}')
+
+    def assert_in_page_source(self,
+                              *messages: str,
+                              regex: bool = False,
+                              timeout: int = 1) -> t.Dict[str, str]:
+        if self.http_page is None:
+            return super().assert_in_page_source(
+                *messages, regex=regex, timeout=timeout)
+        missing, snippets = search_text(self.http_page.content, messages, regex)
+        if missing:
+            missing_messages = ', '.join(f'"{message}"' for message in missing)
+            raise SeleniumAssertionError(
+                f'{missing_messages} not found in page source.')
+        return snippets
+
+    def assert_all(self, *conditions: CompositeCondition, timeout: int = 1) -> None:
+        if self.http_page is None:
+            return super().assert_all(*conditions, timeout=timeout)
+        failing = [condition for condition in conditions
+                   if not self.http_condition_met(self.http_page, condition)]
+        if failing:
+            raise SeleniumAssertionError(
+                'Conditions not met: '
+                + ', '.join(map(describe_composite, failing)) + '.')
+
+    def http_condition_met(self,
+                           page: HttpPage,
+                           condition: CompositeCondition) -> bool:
+        if isinstance(condition, OnPage):
+            return self.server_url + condition.url_path == page.url
+        if isinstance(condition, InPageSource):
+            missing, _ = search_text(page.content, [condition.text],
+                                     condition.regex)
+            return not missing
+        assert isinstance(condition, BrowserCondition)
+        elements = page.soup.select(condition.selector)
+        if not condition.many:
+            elements = elements[:1]
+        return any(condition.text is None or condition.text in element.get_text()
+                   for element in elements)
+
+    def assert_on_page(self, url_path: str) -> None:
+        if self.http_page is None:
+            return super().assert_on_page(url_path)
+        if self.server_url + url_path != self.http_page.url:
+            raise SeleniumAssertionError(
+                f'Expected page "{url_path}", '
+                f'current page: "{self.http_page.url}".'
+            )
+
+    def fill_form_and_submit(self,
+                             form_selector: str,
+                             *,
+                             _fill_mode: t.Optional[str] = None,
+                             **data: InputValue) -> None:
+        if self.http_page is None:
+            return super().fill_form_and_submit(
+                form_selector, _fill_mode=_fill_mode, **data)
+        method, url, form_data = self.http_page.form_submission(
+            form_selector, **data)
+        self.http_page = self.http_request(method, url, form_data)
@@ -1 +1,10 @@
-from .core import KobotoolboxSeleniumMixin  # noqa
+import sys
+
+from puppetmaster.lazy import lazy_attributes
+
+if sys.version_info >= (3, 7):
+    __getattr__ = lazy_attributes(__name__, {
+        'KobotoolboxSeleniumMixin': '.core',
+    })
+else:
+    from .core import KobotoolboxSeleniumMixin  # noqa
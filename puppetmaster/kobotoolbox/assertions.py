@@ -1,25 +1,32 @@
 from selenium.common.exceptions import TimeoutException
 
 from puppetmaster.exceptions import SeleniumAssertionError
-from puppetmaster.waiter import WaiterInterface
+from puppetmaster.waiter import BrowserCondition, WaiterInterface
+
+
+ENKETO_NOTIFICATION_SELECTOR = '#feedback-bar p'
+KPI_NOTIFICATION_SELECTOR = '.alertify-notifier .ajs-message'
+
+
+def enketo_notification(message: str) -> BrowserCondition:
+    """Condition for `assert_all`, see assert_in_enketo_notification"""
+    return BrowserCondition(ENKETO_NOTIFICATION_SELECTOR, message)
+
+
+def kpi_notification(message: str) -> BrowserCondition:
+    """Condition for `assert_all`, see assert_in_kpi_notifications"""
+    return BrowserCondition(KPI_NOTIFICATION_SELECTOR, message, many=True)
 
 
 class KobotoolboxAssertionsMixin(WaiterInterface):
     def assert_in_enketo_notification(self, message: str, timeout: int = 1) -> None:
-        selector = '#feedback-bar p'
         try:
-            self.wait(lambda driver: (
-                message in driver.find_element_by_css_selector(selector).text
-            ), timeout=timeout)
+            self.wait(enketo_notification(message), timeout=timeout)
         except TimeoutException:
             raise SeleniumAssertionError(f'"{message}" not found in notifications.')
 
     def assert_in_kpi_notifications(self, message: str, timeout: int = 1) -> None:
-        selector = '.alertify-notifier .ajs-message'
         try:
-            self.wait(lambda driver: any(
-                message in elem.text
-                for elem in driver.find_elements_by_css_selector(selector)
-            ), timeout=timeout)
+            self.wait(kpi_notification(message), timeout=timeout)
         except TimeoutException:
             raise SeleniumAssertionError(f'"{message}" not found in notifications.')
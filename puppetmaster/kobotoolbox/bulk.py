@@ -0,0 +1,303 @@
+import base64
+import collections
+import threading
+import time
+import typing as t
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from xml.dom import minidom
+
+DEFAULT_CONCURRENCY = 10
+SUBMIT_TIMEOUT = 30
+# Headers describing the recorded body, which is encoded again on replay
+BODY_HEADERS = {'content-type', 'content-length'}
+
+Row = t.Mapping[str, t.Any]
+
+# Wraps XMLHttpRequest and fetch so the first request matching the pattern is
+# kept, with FormData entries serialized and files base64-encoded, in a
+# promise read by RECORDED_SUBMISSION_SCRIPT.
+RECORD_SUBMISSION_SCRIPT = """
+var pattern = new RegExp(arguments[0]);
+var resolve;
+window.__puppetMasterSubmission = new Promise(function (r) { resolve = r; });
+
+function readPart(name, value) {
+  if (typeof value === 'string') {
+    return Promise.resolve({name: name, content: btoa(unescape(
+      encodeURIComponent(value)))});
+  }
+  return new Promise(function (done) {
+    var reader = new FileReader();
+    reader.onload = function () {
+      done({
+        name: name,
+        content: reader.result.split(',')[1] || '',
+        filename: value.name || 'blob',
+        contentType: value.type || 'application/octet-stream'
+      });
+    };
+    reader.readAsDataURL(value);
+  });
+}
+
+function record(method, url, headers, body) {
+  if (!resolve || !pattern.test(url)) {
+    return;
+  }
+  var request = {method: method.toUpperCase(), url: url, headers: headers};
+  resolve(request);
+  resolve = null;
+  if (body instanceof FormData) {
+    var entries = [];
+    body.forEach(function (value, name) { entries.push(readPart(name, value)); });
+    request.parts = Promise.all(entries);
+  } else if (body) {
+    request.parts = readPart('', body).then(function (part) { return [part]; });
+    request.raw = true;
+  } else {
+    request.parts = Promise.resolve([]);
+  }
+}
+
+var open = XMLHttpRequest.prototype.open;
+var setRequestHeader = XMLHttpRequest.prototype.setRequestHeader;
+var send = XMLHttpRequest.prototype.send;
+XMLHttpRequest.prototype.open = function (method, url) {
+  this.__puppetMaster = {
+    method: method, url: new URL(url, location.href).href, headers: {}};
+  return open.apply(this, arguments);
+};
+XMLHttpRequest.prototype.setRequestHeader = function (name, value) {
+  if (this.__puppetMaster) {
+    this.__puppetMaster.headers[name] = value;
+  }
+  return setRequestHeader.apply(this, arguments);
+};
+XMLHttpRequest.prototype.send = function (body) {
+  var request = this.__puppetMaster;
+  if (request) {
+    record(request.method, request.url, request.headers, body);
+  }
+  return send.apply(this, arguments);
+};
+
+if (window.fetch) {
+  var fetch = window.fetch;
+  window.fetch = function (input, init) {
+    init = init || {};
+    var headers = {};
+    new Headers(init.headers || {}).forEach(function (value, name) {
+      headers[name] = value;
+    });
+    record(init.method || 'GET', new URL(input.url || input, location.href).href,
+           headers, init.body);
+    return fetch.apply(this, arguments);
+  };
+}
+"""
+
+RECORDED_SUBMISSION_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var recorded = window.__puppetMasterSubmission;
+if (!recorded) {
+  done(null);
+  return;
+}
+recorded.then(function (request) {
+  return request.parts.then(function (parts) {
+    request.parts = parts;
+    done(request);
+  });
+}).catch(function () { done(null); });
+"""
+
+
+class SubmissionPart(t.NamedTuple):
+    name: str
+    content: bytes
+    filename: t.Optional[str] = None
+    content_type: t.Optional[str] = None
+
+    @property
+    def is_xml(self) -> bool:
+        return bool(self.content_type and 'xml' in self.content_type
+                    or self.content.lstrip().startswith(b'<'))
+
+
+def render_xml(content: bytes, values: Row) -> bytes:
+    """Set the text of the instance elements named in `values`.
+
+    The instanceID gets a new UUID, otherwise the server would discard the
+    replayed submissions as duplicates. minidom keeps namespace prefixes and
+    declarations as they were recorded.
+    """
+    document = minidom.parseString(content)
+    try:
+        for element in document.getElementsByTagName('*'):
+            name = element.localName
+            if name in values:
+                set_text(document, element, str(values[name]))
+            elif name == 'instanceID':
+                set_text(document, element, f'uuid:{uuid.uuid4()}')
+        return document.toxml(encoding='utf-8')
+    finally:
+        document.unlink()
+
+
+def set_text(document: minidom.Document, element: minidom.Element, text: str) -> None:
+    for child in list(element.childNodes):
+        if child.nodeType == child.TEXT_NODE:
+            element.removeChild(child)
+    element.insertBefore(document.createTextNode(text), element.firstChild)
+
+
+def encode_multipart(parts: t.List[SubmissionPart]) -> t.Tuple[str, bytes]:
+    boundary = uuid.uuid4().hex
+    lines = []
+    for part in parts:
+        disposition = f'form-data; name="{part.name}"'
+        if part.filename is not None:
+            disposition += f'; filename="{part.filename}"'
+        lines.append(f'--{boundary}\r\n'
+                     f'Content-Disposition: {disposition}\r\n'.encode())
+        if part.content_type is not None:
+            lines.append(f'Content-Type: {part.content_type}\r\n'.encode())
+        lines.append(b'\r\n' + part.content + b'\r\n')
+    lines.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(lines)
+
+
+class RecordedSubmission(t.NamedTuple):
+    method: str
+    url: str
+    headers: t.Dict[str, str]
+    parts: t.List[SubmissionPart]
+    # Whether the single part is the raw request body rather than form data
+    raw: bool = False
+
+    @classmethod
+    def from_script(cls,
+                    request: t.Dict[str, t.Any],
+                    cookies: t.List[t.Dict[str, t.Any]]) -> 'RecordedSubmission':
+        raw = bool(request.get('raw'))
+        headers = {name: value for name, value in request['headers'].items()
+                   if name.lower() not in BODY_HEADERS
+                   or raw and name.lower() == 'content-type'}
+        if cookies:
+            headers['Cookie'] = '; '.join(f"{cookie['name']}={cookie['value']}"
+                                          for cookie in cookies)
+        parts = [SubmissionPart(part['name'],
+                                base64.b64decode(part['content']),
+                                part.get('filename'),
+                                part.get('contentType'))
+                 for part in request['parts']]
+        return cls(request['method'], request['url'], headers, parts, raw)
+
+    def render(self, values: Row) -> t.Tuple[t.Dict[str, str], bytes]:
+        """Headers and body of the submission with templated values"""
+        parts = [part._replace(content=render_xml(part.content, values))
+                 if part.is_xml else part
+                 for part in self.parts]
+        headers = dict(self.headers)
+        if self.raw:
+            return headers, parts[0].content
+        headers['Content-Type'], body = encode_multipart(parts)
+        return headers, body
+
+
+class BulkSubmissionReport:
+    def __init__(self) -> None:
+        self.latencies: t.List[float] = []
+        self.statuses: t.Counter[int] = collections.Counter()
+        # Requests which got no response at all
+        self.errors = 0
+        self.duration = 0.0
+
+    @property
+    def submitted(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def failed(self) -> int:
+        return self.errors + sum(count for status, count in self.statuses.items()
+                                 if not 200 <= status < 300)
+
+    @property
+    def throughput(self) -> float:
+        """Submissions per second"""
+        return self.submitted / self.duration if self.duration else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Latency in seconds, by the nearest-rank method"""
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        rank = max(int(len(latencies) * percent / 100 + 0.5), 1)
+        return latencies[min(rank, len(latencies)) - 1]
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'submitted': self.submitted,
+            'failed': self.failed,
+            'statuses': dict(self.statuses),
+            'duration': self.duration,
+            'throughput': self.throughput,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+    def __repr__(self) -> str:
+        return f'BulkSubmissionReport({self.as_dict()})'
+
+
+def replay_submissions(submission: RecordedSubmission,
+                       rows: t.Iterable[Row],
+                       concurrency: int = DEFAULT_CONCURRENCY,
+                       url: t.Optional[str] = None,
+                       timeout: float = SUBMIT_TIMEOUT) -> BulkSubmissionReport:
+    """Send the recorded submission once per row from a thread pool.
+
+    Rows are read lazily, with at most `concurrency` requests in flight.
+    `url` overrides the recorded URL, e.g. to target a stand-in server.
+    """
+    report = BulkSubmissionReport()
+    slots = threading.Semaphore(concurrency)
+    lock = threading.Lock()
+
+    def submit(headers: t.Dict[str, str], body: bytes) -> None:
+        request = urllib.request.Request(url or submission.url, body, headers,
+                                         method=submission.method)
+        start = time.perf_counter()
+        status = None
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            pass
+        latency = time.perf_counter() - start
+        with lock:
+            report.latencies.append(latency)
+            if status is None:
+                report.errors += 1
+            else:
+                report.statuses[status] += 1
+
+    def release(future: Future) -> None:
+        slots.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for values in rows:
+            # Rendered here, so broken rows fail the run right away
+            headers, body = submission.render(values)
+            slots.acquire()
+            executor.submit(submit, headers, body).add_done_callback(release)
+    report.duration = time.perf_counter() - start
+    return report
@@ -1,6 +1,22 @@
+import typing as t
+from urllib.parse import urlsplit
+
 from django.conf import settings
-from registration.models import RegistrationProfile
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
 
+from puppetmaster.exceptions import PuppetMasterException
+from puppetmaster.lazy import SettingsAttribute
+from puppetmaster.sessions import session_cache
+from .bulk import (
+    DEFAULT_CONCURRENCY,
+    RECORD_SUBMISSION_SCRIPT,
+    RECORDED_SUBMISSION_SCRIPT,
+    BulkSubmissionReport,
+    RecordedSubmission,
+    Row,
+    replay_submissions)
 from .form_filling import EnketoFormFillingMixin
 from .assertions import KobotoolboxAssertionsMixin
 
@@ -9,6 +25,107 @@ class Urls:
     LOGIN = "/accounts/login/"
     CREATE_ACCOUNT = "/accounts/register/"
     ACCOUNT_SETTINGS = "/#/account-settings"
+    CURRENT_USER = "/me/"
+
+
+CURRENT_USERNAME_SCRIPT = """
+var request = new XMLHttpRequest();
+request.open('GET', arguments[0], false);
+request.send();
+try {
+  return request.status === 200 ? JSON.parse(request.responseText).username : null;
+} catch (e) {
+  return null;
+}
+"""
+
+# Finds the element under `container` whose own text equals `text`, through an
+# index of element texts cached on the container until the number of elements
+# changes. React reuses nodes for different items, so a cached element is only
+# returned while it still holds the text, otherwise the index is rebuilt. When
+# nothing matches, the last element is scrolled into view so lazily rendered
+# lists load more items before the next poll.
+FIND_BY_TEXT_SCRIPT = """
+var container = document.querySelector(arguments[0]);
+var scope = arguments[1], text = arguments[2], linkLevels = arguments[3];
+if (!container) {
+  return null;
+}
+var elements = container.querySelectorAll(scope + ' *');
+
+function ownTexts(el) {
+  return Array.prototype.map.call(el.childNodes, function (node) {
+    return node.nodeType === Node.TEXT_NODE ? node.nodeValue.trim() : '';
+  }).filter(Boolean);
+}
+
+function buildIndex() {
+  var byText = Object.create(null);
+  Array.prototype.forEach.call(elements, function (el) {
+    ownTexts(el).forEach(function (nodeText) {
+      if (!(nodeText in byText)) {
+        byText[nodeText] = el;
+      }
+    });
+  });
+  return container.__puppetMasterIndex = {
+    scope: scope, size: elements.length, byText: byText};
+}
+
+function holdsText(el) {
+  return el && el.isConnected && ownTexts(el).indexOf(text) !== -1;
+}
+
+var index = container.__puppetMasterIndex;
+var rebuilt = !index || index.scope !== scope || index.size !== elements.length;
+if (rebuilt) {
+  index = buildIndex();
+}
+var element = index.byText[text];
+if (!holdsText(element) && !rebuilt) {
+  element = buildIndex().byText[text];
+}
+if (!holdsText(element)) {
+  if (elements.length) {
+    elements[elements.length - 1].scrollIntoView({block: 'end'});
+  }
+  return null;
+}
+// Climb to the closest ancestor with a link, e.g. the row of an asset
+for (var el = element, level = 0; el && level <= linkLevels;
+     el = el.parentElement, level++) {
+  var link = el.querySelector(':scope > a');
+  if (link) {
+    return link;
+  }
+}
+return element;
+"""
+
+
+class TextLookup:
+    """Wait condition finding an element by its exact text in one script call.
+
+    With `link_levels`, returns the link found among the element's children or
+    those of up to `link_levels` of its ancestors.
+    """
+
+    def __init__(self,
+                 container: str,
+                 text: str,
+                 scope: str = ':scope',
+                 link_levels: int = 0) -> None:
+        self.container = container
+        self.text = text
+        self.scope = scope
+        self.link_levels = link_levels
+
+    def __repr__(self) -> str:
+        return f'TextLookup({self.container!r}, {self.text!r})'
+
+    def __call__(self, driver: webdriver.Remote) -> t.Any:
+        return driver.execute_script(FIND_BY_TEXT_SCRIPT, self.container,
+                                     self.scope, self.text, self.link_levels)
 
 
 class KobotoolboxSeleniumMixin(KobotoolboxAssertionsMixin,
@@ -17,39 +134,114 @@ class KobotoolboxSeleniumMixin(KobotoolboxAssertionsMixin,
     Wrapper for kobotoolbox-specific functions
     """
     ENKETO_FORM_SELECTOR = '.main .paper form'
-    USERNAME = settings.PM__KT_USERNAME
-    PASSWORD = settings.PM__KT_PASSWORD
+    USERNAME = SettingsAttribute('PM__KT_USERNAME')
+    PASSWORD = SettingsAttribute('PM__KT_PASSWORD')
+    # Reuse session cookies of earlier logins instead of submitting the form
+    CACHE_LOGIN_SESSIONS = False
+    # Regular expression matching the URL of Enketo submission requests
+    SUBMISSION_URL_PATTERN = r'/submission'
+    BULK_SUBMISSION_CONCURRENCY = DEFAULT_CONCURRENCY
+    # Search input filtering the asset list, typed into by `select_form`
+    ASSET_SEARCH_SELECTOR: t.Optional[str] = None
+    # Seconds to wait for an item to show up, long lists render lazily
+    LOOKUP_TIMEOUT = 10
+    # Seconds to wait for the redirect away from the login page
+    LOGIN_TIMEOUT = 10
 
     def login_automatically(self) -> None:
         self.log_in_as_user(self.USERNAME, self.PASSWORD)
 
     def log_in_as_user(self, username: str, password: str) -> None:
         self.driver.get(settings.PM__SERVICE_URL + Urls.LOGIN)
+        if self.CACHE_LOGIN_SESSIONS and self.restore_session(username):
+            return
+
         self.fill_form_and_submit(
             '.registration.registration--login',
             username=username, password=password)
 
+        if self.CACHE_LOGIN_SESSIONS:
+            # XXX: The session cookie name of the service is not known here,
+            # leaving the login page means the session cookies are all set.
+            try:
+                WebDriverWait(self.driver, self.LOGIN_TIMEOUT,
+                              poll_frequency=0.05).until(
+                    lambda driver: urlsplit(driver.current_url).path != Urls.LOGIN)
+            except TimeoutException:
+                # The login failed, e.g. a wrong password, nothing to cache
+                return
+            session_cache.store((username, settings.PM__SERVICE_URL),
+                                self.driver.get_cookies())
+
+    def restore_session(self, username: str) -> bool:
+        """Inject cached session cookies and check they still authenticate
+        the user. Has to be called on a page of the service.
+        """
+        key = (username, settings.PM__SERVICE_URL)
+        cookies = session_cache.get(key)
+        if cookies is None:
+            return False
+
+        for cookie in cookies:
+            self.driver.add_cookie(cookie)
+        current_username = self.driver.execute_script(
+            CURRENT_USERNAME_SCRIPT, settings.PM__SERVICE_URL + Urls.CURRENT_USER)
+        if current_username == username:
+            return True
+
+        session_cache.invalidate(key)
+        self.driver.delete_all_cookies()
+        return False
+
+    def log_in_session(self, session: t.Any, user: t.Any) -> None:
+        """Log a session in as `user`, a username or (username, password)"""
+        username, password = user if isinstance(user, tuple) else (user, self.PASSWORD)
+        # Keep passwords out of session results
+        session.user = username
+        session.log_in_as_user(username, password)
+
+    def record_submission(self, **data) -> RecordedSubmission:
+        """Fill and submit the open Enketo form, recording the request sent"""
+        self.driver.execute_script(RECORD_SUBMISSION_SCRIPT,
+                                   self.SUBMISSION_URL_PATTERN)
+        self.fill_enketo_form_and_submit(self.ENKETO_FORM_SELECTOR, **data)
+        request = self.driver.execute_async_script(RECORDED_SUBMISSION_SCRIPT)
+        if request is None:
+            raise PuppetMasterException('No submission request was recorded.')
+        return RecordedSubmission.from_script(request, self.driver.get_cookies())
+
+    def bulk_submit(self,
+                    rows: t.Iterable[Row],
+                    url: t.Optional[str] = None,
+                    **data) -> BulkSubmissionReport:
+        """Submit the open Enketo form once in the browser, then replay the
+        submission over HTTP for each row of values.
+        """
+        submission = self.record_submission(**data)
+        return replay_submissions(submission, rows,
+                                  self.BULK_SUBMISSION_CONCURRENCY, url)
+
     @staticmethod
     def verify_email(username: str) -> None:
+        # Imported here, as the app is only installed in Kobotoolbox projects
+        from registration.models import RegistrationProfile
         reg_profile = RegistrationProfile.objects.get(user__username=username)
         reg_profile.activated = True
         reg_profile.save()
 
+    def select_by_text(self, lookup: TextLookup) -> None:
+        self.wait(lookup, self.LOOKUP_TIMEOUT).click()
+
     def select_form(self, form_name: str) -> None:
-        assets_list_el = self.wait_for_element(".asset-list")
-        form_selector = ("//*[contains(@class,'asset-items')]"
-                         "//*[text()='{}']".format(form_name))
-        desired_form = assets_list_el.find_element_by_xpath(form_selector)
-        desired_form_link = desired_form.find_element_by_xpath('../../../a')
-        desired_form_link.click()
+        if self.ASSET_SEARCH_SELECTOR is not None:
+            search = self.wait_for_element(self.ASSET_SEARCH_SELECTOR)
+            search.clear()
+            search.send_keys(form_name)
+        self.select_by_text(TextLookup('.asset-list', form_name,
+                                       scope='.asset-items', link_levels=3))
 
     def select_tab_in_form_view(self, tab_name: str) -> None:
-        tab_selector = ("//*[contains(@class,'form-view__toptabs')]"
-                        "//*[text()='{}']".format(tab_name))
-        tabs = self.wait_for_element(".form-view__toptabs")
-        tabs.find_element_by_xpath(tab_selector).click()
+        self.select_by_text(TextLookup('.form-view__toptabs', tab_name))
 
     def select_side_tab_in_form_view(self, tab_name: str) -> None:
-        tab_selector = ("//*[contains(@class,'form-view__sidetabs')]"
-                        "//*[text()='{}']".format(tab_name))
-        self.driver.find_element_by_xpath(tab_selector).click()
+        self.select_by_text(TextLookup('.form-view__sidetabs', tab_name))
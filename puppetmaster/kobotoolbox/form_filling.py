@@ -1,9 +1,142 @@
+import time
+import typing as t
+
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import InvalidElementStateException
 
+from puppetmaster.exceptions import MissingDataException
 from puppetmaster.form_filling import FormFillingInterface, InputValue
 
+EnketoValue = t.Union[InputValue, t.List[t.Any]]
+
+ENKETO_PAGE_SCRIPT = """
+function enketoPages(form) {
+  var pages = Array.prototype.filter.call(
+    form.querySelectorAll('[role="page"]'),
+    function (page) { return !page.classList.contains('disabled'); });
+  var current = form.querySelector('[role="page"].current');
+  return {pages: pages, current: current, index: pages.indexOf(current)};
+}
+"""
+
+CURRENT_PAGE_SCRIPT = ENKETO_PAGE_SCRIPT + """
+return enketoPages(arguments[0]).index;
+"""
+
+NEXT_PAGE_SCRIPT = """
+document.querySelector('.next-page').click();
+"""
+
+# Fills every relevant question of the current page (or of the whole form
+# when it has no pages). Values are set on the original inputs Enketo keeps
+# in sync with its model, so date and time pickers are never opened.
+FILL_ENKETO_PAGE_SCRIPT = ENKETO_PAGE_SCRIPT + """
+var form = arguments[0], data = arguments[1];
+var pages = enketoPages(form);
+var scope = pages.current || form;
+var missing = [], filled = 0;
+
+function shortName(path) {
+  return path.split('/').pop();
+}
+
+function fire(el, type) {
+  el.dispatchEvent(new Event(type, {bubbles: true}));
+}
+
+// Enketo renames radio inputs in repeat instances to keep their groups apart,
+// the path of the question stays in data-name
+function fieldName(el) {
+  return el.dataset.name || el.name;
+}
+
+function repeatInstances(path) {
+  return form.querySelectorAll('.or-repeat[name="' + path + '"]');
+}
+
+function valueFor(el) {
+  var name = shortName(fieldName(el)), repeat = el.closest('.or-repeat');
+  if (!repeat) {
+    return data[name];
+  }
+  var path = repeat.getAttribute('name');
+  var index = Array.prototype.indexOf.call(repeatInstances(path), repeat);
+  var instances = data[shortName(path)] || [];
+  return instances[index] ? instances[index][name] : undefined;
+}
+
+// Add repeat instances until there is one per item in data
+Array.prototype.forEach.call(
+  scope.querySelectorAll('.or-repeat-info[data-name]'), function (info) {
+    var path = info.getAttribute('data-name');
+    var wanted = (data[shortName(path)] || []).length;
+    for (var count = repeatInstances(path).length; count < wanted; count++) {
+      var instances = repeatInstances(path);
+      var button = info.querySelector('.add-repeat-btn') || (instances.length &&
+        instances[instances.length - 1].querySelector('.add-repeat-btn'));
+      if (!button) {
+        break;
+      }
+      button.click();
+    }
+  });
+
+Array.prototype.forEach.call(
+  scope.querySelectorAll('input[name], select[name], textarea[name]'),
+  function (el) {
+    if (el.type === 'hidden' || el.readOnly || el.closest('.disabled, .note')) {
+      return;
+    }
+    var value = valueFor(el);
+    if (value === undefined) {
+      if (missing.indexOf(fieldName(el)) === -1) {
+        missing.push(fieldName(el));
+      }
+      return;
+    }
+
+    if (el.type === 'radio' || el.type === 'checkbox') {
+      var values = Array.isArray(value) ? value.map(String)
+        : el.type === 'checkbox' ? String(value).split(' ') : [String(value)];
+      var checked = values.indexOf(el.value) !== -1;
+      if (el.checked !== checked) {
+        el.checked = checked;
+        fire(el, 'change');
+      }
+    } else if (el.multiple) {
+      var selected = Array.isArray(value) ? value.map(String) : [String(value)];
+      Array.prototype.forEach.call(el.options, function (option) {
+        option.selected = selected.indexOf(option.value) !== -1;
+      });
+      fire(el, 'change');
+    } else {
+      el.value = String(value);
+      fire(el, 'input');
+      fire(el, 'change');
+      // Keep widgets (e.g. date and time pickers) showing the new value
+      var widget = el.parentNode.querySelector('.widget input');
+      if (widget) {
+        widget.value = String(value);
+      }
+    }
+    filled++;
+  });
+
+return {
+  page: Math.max(pages.index, 0),
+  filled: filled,
+  missing: missing,
+  hasNext: pages.index !== -1 && pages.index < pages.pages.length - 1
+};
+"""
+
+
+class PageTiming(t.NamedTuple):
+    page: int
+    fields: int
+    duration: float
+
 
 class EnketoFormFillingMixin(FormFillingInterface):
     """
@@ -37,6 +170,60 @@ class EnketoFormFillingMixin(FormFillingInterface):
     def fill_time_input(self, input_el: WebElement, time: InputValue) -> None:
         self._fill_date_input(input_el, time, 'timepicker')
 
+    def fill_enketo_form(self,
+                         form_selector: str,
+                         **data: EnketoValue) -> t.List[PageTiming]:
+        """Fill an Enketo form page by page, one script call per page.
+
+        Repeat groups take a list with a dict of values per instance,
+        instances are added as needed. Returns the time spent on each page.
+
+        Example parameters:
+        form_selector = '.main .paper form'
+        data = {
+            'name': 'Name',
+            'birthday': '2019-12-12',
+            'household': [{'member': 'Alice'}, {'member': 'Bob'}],
+        }
+        """
+        form = self.wait_for_element(form_selector)
+        values = {name: self.script_value(value) for name, value in data.items()}
+        timings = []
+        while True:
+            start = time.perf_counter()
+            result = self.driver.execute_script(
+                FILL_ENKETO_PAGE_SCRIPT, form, values)
+            if result['missing']:
+                raise MissingDataException(f"Form is missing {result['missing']} "
+                                           f"inputs in {data}")
+            if result['hasNext']:
+                page = result['page']
+                self.driver.execute_script(NEXT_PAGE_SCRIPT)
+                self.wait(lambda driver: driver.execute_script(
+                    CURRENT_PAGE_SCRIPT, form) != page)
+            timings.append(PageTiming(result['page'], result['filled'],
+                                      time.perf_counter() - start))
+            if not result['hasNext']:
+                return timings
+
+    def fill_enketo_form_and_submit(self,
+                                    form_selector: str,
+                                    **data: EnketoValue) -> t.List[PageTiming]:
+        timings = self.fill_enketo_form(form_selector, **data)
+        self.submit_form(self.wait_for_element(form_selector))
+        return timings
+
+    @classmethod
+    def script_value(cls, value: t.Any) -> t.Any:
+        """Strip input types from values, which the script does not need"""
+        if isinstance(value, tuple):
+            return value[1]
+        if isinstance(value, list):
+            return [cls.script_value(item) for item in value]
+        if isinstance(value, dict):
+            return {name: cls.script_value(item) for name, item in value.items()}
+        return value
+
     def submit_form(self, form: WebElement) -> None:
         form_selector = ("." + ".".join(form.get_attribute("class").split(" "))
                          if form else 'form')
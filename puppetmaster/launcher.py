@@ -0,0 +1,287 @@
+import atexit
+import copy
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import typing as t
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from .drivers import Browsers, browser_name
+
+DriverFactory = t.Callable[[], webdriver.Remote]
+# PM__SELENIUM_DRIVER, a driver class or a functools.partial of one
+DriverClass = t.Callable[..., webdriver.Remote]
+
+CHROME_ARGUMENTS = [
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-sync',
+]
+# Seconds `take` waits for a browser being launched before launching its own
+LAUNCH_TIMEOUT = 60
+# Chrome refuses to start on a profile locked by another instance
+CHROME_LOCK_FILES = ['SingletonLock', 'SingletonSocket', 'SingletonCookie']
+FIREFOX_PREFERENCES = {
+    'browser.shell.checkDefaultBrowser': False,
+    'browser.startup.page': 0,
+    'browser.startup.homepage_override.mstone': 'ignore',
+    'startup.homepage_welcome_url': 'about:blank',
+    'datareporting.policy.dataSubmissionEnabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'toolkit.telemetry.reportingpolicy.firstRun': False,
+    'app.update.auto': False,
+    'app.update.enabled': False,
+}
+
+
+def chrome_options(driver: DriverClass, *arguments: str) -> t.Dict[str, t.Any]:
+    """Driver arguments with a copy of the Chrome options the driver was
+    given with functools.partial (e.g. headless), plus `arguments`.
+    """
+    keywords = getattr(driver, 'keywords', {})
+    # XXX: Chrome prefers the deprecated chrome_options over options
+    name = 'chrome_options' if keywords.get('chrome_options') else 'options'
+    options = keywords.get(name)
+    options = (copy.deepcopy(options) if options is not None
+               else webdriver.ChromeOptions())
+    for argument in CHROME_ARGUMENTS + list(arguments):
+        options.add_argument(argument)
+    return {name: options}
+
+
+class LaunchStats:
+    def __init__(self) -> None:
+        self.spawned = 0
+        self.failed = 0
+        # Drivers handed out right away / after waiting for a launch
+        self.ready = 0
+        self.waited = 0
+        self.spawn_times: t.List[float] = []
+        self.wait_times: t.List[float] = []
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'spawned': self.spawned,
+            'failed': self.failed,
+            'ready': self.ready,
+            'waited': self.waited,
+            'spawn_to_ready_mean': (statistics.mean(self.spawn_times)
+                                    if self.spawn_times else 0.0),
+            'spawn_to_ready_max': max(self.spawn_times, default=0.0),
+            'wait_total': sum(self.wait_times),
+        }
+
+    def __repr__(self) -> str:
+        return f'LaunchStats({self.as_dict()})'
+
+
+class BrowserLauncher:
+    """Keeps `spares` browsers launched in the background.
+
+    Browsers start from a template profile prepared once, with first-run
+    dialogs disabled (and for Chrome, a profile initialized by a first
+    launch). `take` hands out a ready browser and launches its replacement
+    in the background.
+    """
+
+    def __init__(self, spares: int) -> None:
+        self.spares = spares
+        self.stats = LaunchStats()
+        self._ready: t.List[webdriver.Remote] = []
+        self._pending = 0
+        # Unexpected launch error of a spare, raised again by `take`
+        self._error: t.Optional[Exception] = None
+        self._closed = False
+        self._template: t.Optional[str] = None
+        self._directories: t.List[str] = []
+        self._condition = threading.Condition()
+        self._template_lock = threading.Lock()
+
+    def profile_kwargs(self, driver: DriverClass) -> t.Dict[str, t.Any]:
+        """Driver arguments starting the browser from a copy of the template"""
+        browser = browser_name(driver)
+        if browser == Browsers.Chrome:
+            return chrome_options(
+                driver, f'--user-data-dir={self.copy_template(driver)}')
+        if browser == Browsers.Firefox:
+            # FirefoxProfile copies the template directory itself, options
+            # the driver was given are kept as they are
+            return {'firefox_profile': webdriver.FirefoxProfile(
+                self.template(driver))}
+        return {}
+
+    def launch(self, driver: DriverClass, **kwargs: t.Any) -> webdriver.Remote:
+        """Start a browser from the template profile.
+
+        A Chrome profile copy is removed once the browser quits.
+        """
+        if browser_name(driver) != Browsers.Chrome:
+            return driver(**kwargs, **self.profile_kwargs(driver))
+        directory = self.copy_template(driver)
+        try:
+            launched = driver(**kwargs, **chrome_options(
+                driver, f'--user-data-dir={directory}'))
+        except BaseException:
+            self.remove_copy(directory)
+            raise
+        quit = launched.quit
+
+        def _quit_and_remove_copy() -> None:
+            try:
+                quit()
+            finally:
+                self.remove_copy(directory)
+
+        launched.quit = _quit_and_remove_copy
+        return launched
+
+    def template(self, driver: DriverClass) -> str:
+        with self._template_lock:
+            if self._template is None:
+                self._template = self.prepare_template(driver)
+                self._directories.append(self._template)
+            return self._template
+
+    def copy_template(self, driver: DriverClass) -> str:
+        template = self.template(driver)
+        parent = tempfile.mkdtemp(prefix='puppetmaster_profile_')
+        with self._template_lock:
+            self._directories.append(parent)
+        directory = os.path.join(parent, 'profile')
+        shutil.copytree(template, directory,
+                        ignore=shutil.ignore_patterns(*CHROME_LOCK_FILES))
+        return directory
+
+    def remove_copy(self, directory: str) -> None:
+        parent = os.path.dirname(directory)
+        with self._template_lock:
+            if parent in self._directories:
+                self._directories.remove(parent)
+        shutil.rmtree(parent, ignore_errors=True)
+
+    @staticmethod
+    def prepare_template(driver: DriverClass) -> str:
+        if browser_name(driver) == Browsers.Firefox:
+            profile = webdriver.FirefoxProfile()
+            for name, value in FIREFOX_PREFERENCES.items():
+                profile.set_preference(name, value)
+            profile.update_preferences()
+            return profile.path
+
+        directory = tempfile.mkdtemp(prefix='puppetmaster_template_')
+        if browser_name(driver) == Browsers.Chrome:
+            # Let a first launch create the profile, so copies skip that work
+            launched = driver(executable_path=settings.PM__SELENIUM_DRIVER_PATH,
+                              **chrome_options(driver, f'--user-data-dir={directory}'))
+            launched.get('about:blank')
+            launched.quit()
+        return directory
+
+    def take(self, factory: DriverFactory) -> webdriver.Remote:
+        """Return a launched browser, launched by `factory` if none is ready.
+
+        Raises the error a spare failed to launch with, unless it was a
+        WebDriverException or OSError.
+        """
+        start = time.perf_counter()
+        self.refill(factory)
+        error = None
+        with self._condition:
+            if self._ready:
+                self.stats.ready += 1
+                driver = self._ready.pop(0)
+            else:
+                # A browser already starting is ready sooner than a new one
+                self._condition.wait_for(
+                    lambda: self._ready or not self._pending or self._error,
+                    LAUNCH_TIMEOUT)
+                driver = self._ready.pop(0) if self._ready else None
+                if driver is None:
+                    error, self._error = self._error, None
+                self.stats.waited += 1
+        if error is not None:
+            raise error
+        if driver is None:
+            driver = factory()
+        self.stats.wait_times.append(time.perf_counter() - start)
+        self.refill(factory)
+        return driver
+
+    def refill(self, factory: DriverFactory) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            missing = self.spares - len(self._ready) - self._pending
+            self._pending += max(missing, 0)
+        for _ in range(missing):
+            threading.Thread(target=self._spawn, args=(factory,), daemon=True).start()
+
+    def _spawn(self, factory: DriverFactory) -> None:
+        start = time.perf_counter()
+        driver = None
+        try:
+            driver = factory()
+        except (WebDriverException, OSError):
+            pass
+        except Exception as e:
+            # e.g. a TypeError from bad driver arguments, which launching
+            # again would not fix
+            with self._condition:
+                self._error = e
+        finally:
+            with self._condition:
+                self._pending -= 1
+                if driver is None:
+                    self.stats.failed += 1
+                else:
+                    self.stats.spawned += 1
+                    self.stats.spawn_times.append(time.perf_counter() - start)
+                closed = self._closed
+                if driver is not None and not closed:
+                    self._ready.append(driver)
+                self._condition.notify_all()
+        if driver is not None and closed:
+            self._quit(driver)
+
+    def close(self) -> None:
+        with self._condition:
+            ready, self._ready = self._ready, []
+            self._closed = True
+        for driver in ready:
+            self._quit(driver)
+        with self._template_lock:
+            directories, self._directories = self._directories, []
+        for directory in directories:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def _quit(driver: webdriver.Remote) -> None:
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+_launcher: t.Optional[BrowserLauncher] = None
+_launcher_lock = threading.Lock()
+
+
+def get_browser_launcher() -> t.Optional[BrowserLauncher]:
+    """Return the process-wide launcher, or None if pre-warming is disabled"""
+    global _launcher
+    spares = getattr(settings, 'PM__PREWARM_BROWSERS', 0)
+    if not spares:
+        return None
+    with _launcher_lock:
+        if _launcher is None:
+            _launcher = BrowserLauncher(spares)
+            atexit.register(_launcher.close)
+    return _launcher
@@ -0,0 +1,32 @@
+import importlib
+import sys
+import typing as t
+
+
+def lazy_attributes(package: str,
+                    attributes: t.Dict[str, str]) -> t.Callable[[str], t.Any]:
+    """Module `__getattr__` importing each attribute from its submodule
+    on first access, given as {attribute: submodule}.
+    """
+    def __getattr__(name: str) -> t.Any:
+        if name not in attributes:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(attributes[name], package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
+
+
+class SettingsAttribute:
+    """Class attribute read from Django settings when it is first accessed,
+    so classes can be defined before settings are configured.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: t.Any, owner: type) -> t.Any:
+        # Importing Django settings is not free either, see __init__
+        from django.conf import settings
+        return getattr(settings, self.name)
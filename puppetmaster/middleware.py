@@ -1,13 +1,74 @@
-from django.contrib.auth import login
+import threading
+import typing as t
+import uuid
+
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, login
+
+Cookie = t.Dict[str, t.Any]
+
+
+class AutoLoginStats:
+    def __init__(self) -> None:
+        self.logins = 0
+        self.skipped = 0
+
+    def as_dict(self) -> t.Dict[str, int]:
+        return {'logins': self.logins, 'skipped': self.skipped}
+
+    def __repr__(self) -> str:
+        return f'AutoLoginStats({self.as_dict()})'
 
 
 class AutoLoginMiddleware:
+    """Logs requests in as a test user.
+
+    `user` applies to every request of the process. A browser can be logged in
+    as a different user by sending the cookie returned by `user_cookie`.
+    Sessions already authenticated as the user are not logged in again.
+    """
+    COOKIE_NAME = 'puppetmaster_autologin'
+
     user = None
+    users: t.Dict[str, t.Any] = {}
+    stats = AutoLoginStats()
+    _lock = threading.Lock()
 
     def __init__(self, get_response):
         self.get_response = get_response
 
+    @classmethod
+    def user_cookie(cls, user) -> Cookie:
+        """Register the user and return a cookie logging a browser in as them"""
+        token = uuid.uuid4().hex
+        with cls._lock:
+            cls.users[token] = user
+        return {'name': cls.COOKIE_NAME, 'value': token, 'path': '/'}
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls.user = None
+            cls.users = {}
+
+    def get_user(self, request):
+        token = request.COOKIES.get(self.COOKIE_NAME)
+        if token is not None and token in self.users:
+            return self.users[token]
+        return self.user
+
+    @staticmethod
+    def is_logged_in(request, user) -> bool:
+        session = request.session
+        return (session.get(SESSION_KEY) == user._meta.pk.value_to_string(user)
+                and session.get(HASH_SESSION_KEY) == user.get_session_auth_hash())
+
     def __call__(self, request):
-        if self.user is not None:
-            login(request, self.user)
+        user = self.get_user(request)
+        if user is not None and self.is_logged_in(request, user):
+            with self._lock:
+                self.stats.skipped += 1
+        elif user is not None:
+            login(request, user)
+            with self._lock:
+                self.stats.logins += 1
         return self.get_response(request)
@@ -0,0 +1,53 @@
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import PuppetMasterException
+
+T = t.TypeVar('T')
+R = t.TypeVar('R')
+
+
+class SessionResult(t.NamedTuple):
+    """Outcome of a script run in one browser session"""
+    session: int
+    user: t.Any
+    value: t.Any
+    error: t.Optional[BaseException]
+    # Failure artifact filename, see WaiterMixin.make_screenshot
+    screenshot: t.Optional[str]
+    duration: float
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+class SessionsFailed(PuppetMasterException):
+    def __init__(self, results: t.Sequence[SessionResult]) -> None:
+        self.results = list(results)
+        failures = '; '.join(
+            f'session {result.session} ({result.user}): {result.error!r}'
+            + (f', screenshot {result.screenshot}' if result.screenshot else '')
+            for result in self.results if result.failed)
+        super().__init__(f'Sessions failed: {failures}')
+
+
+def run_concurrently(function: t.Callable[[T], R], items: t.Sequence[T]) -> t.List[R]:
+    """Call the function on every item at once, one thread each"""
+    if not items:
+        return []
+    with ThreadPoolExecutor(len(items)) as executor:
+        return list(executor.map(function, items))
+
+
+def run_session(number: int, session: t.Any, script: t.Callable) -> SessionResult:
+    start = time.perf_counter()
+    value = error = screenshot = None
+    try:
+        value = script(session)
+    except Exception as e:
+        error = e
+        screenshot = session.make_screenshot()
+    return SessionResult(number, session.user, value, error, screenshot,
+                         time.perf_counter() - start)
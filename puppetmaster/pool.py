@@ -0,0 +1,133 @@
+import atexit
+import threading
+import typing as t
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+DriverFactory = t.Callable[[], webdriver.Remote]
+WindowSize = t.Tuple[int, int]
+
+# XXX: Selenium 3 has no command for the W3C New Window endpoint
+NEW_WINDOW_COMMAND = 'puppetmasterNewWindow'
+NEW_WINDOW_ENDPOINT = ('POST', '/session/$sessionId/window/new')
+
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self.launches = 0
+        self.reuses = 0
+        self.failed_resets = 0
+
+    def as_dict(self) -> t.Dict[str, int]:
+        return {
+            'launches': self.launches,
+            'reuses': self.reuses,
+            'failed_resets': self.failed_resets,
+        }
+
+    def __repr__(self) -> str:
+        return f'PoolStats({self.as_dict()})'
+
+
+class DriverPool:
+    """Keeps launched drivers alive between tests.
+
+    Drivers are checked out with `acquire` and handed back with `release`,
+    which resets them to a clean state. A driver that fails to reset is quit
+    and a fresh one is launched on the next `acquire`.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.stats = PoolStats()
+        self._idle: t.List[webdriver.Remote] = []
+        self._lock = threading.Lock()
+
+    def acquire(self, factory: DriverFactory) -> webdriver.Remote:
+        with self._lock:
+            if self._idle:
+                self.stats.reuses += 1
+                return self._idle.pop()
+            self.stats.launches += 1
+        return factory()
+
+    def release(self, driver: webdriver.Remote, window_size: WindowSize) -> None:
+        try:
+            self.reset(driver, window_size)
+        except WebDriverException:
+            with self._lock:
+                self.stats.failed_resets += 1
+            self._quit(driver)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(driver)
+                return
+        self._quit(driver)
+
+    @staticmethod
+    def reset(driver: webdriver.Remote, window_size: WindowSize) -> None:
+        """Bring a driver back to a single blank window with no state"""
+        handles = driver.window_handles
+        if not handles:
+            # The test closed every window
+            handles = [DriverPool.open_window(driver)]
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # XXX: Cookies and storage are scoped to the current origin, so they
+        # have to be cleared before leaving the page.
+        driver.delete_all_cookies()
+        if hasattr(driver, 'execute_cdp_cmd'):
+            # Chrome also clears the cookies of other hosts, e.g. of services
+            # on other subdomains
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_script(CLEAR_STORAGE_SCRIPT)
+        driver.get('about:blank')
+        width, height = window_size
+        driver.set_window_size(width=width, height=height)
+
+    @staticmethod
+    def open_window(driver: webdriver.Remote) -> str:
+        driver.command_executor._commands.setdefault(
+            NEW_WINDOW_COMMAND, NEW_WINDOW_ENDPOINT)
+        return driver.execute(NEW_WINDOW_COMMAND, {'type': 'tab'})['value']['handle']
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver: webdriver.Remote) -> None:
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+_pool: t.Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> t.Optional[DriverPool]:
+    """Return the process-wide pool, or None if pooling is disabled"""
+    global _pool
+    size = getattr(settings, 'PM__DRIVER_POOL_SIZE', 0)
+    if not size:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(size)
+            atexit.register(_pool.close)
+    return _pool
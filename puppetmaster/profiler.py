@@ -0,0 +1,188 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import typing as t
+
+from django.conf import settings
+from selenium import webdriver
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+NO_TEST = '<no test>'
+NO_HELPER = '<driver>'
+REPORT_TOP_HELPERS = 10
+# unittest calls these, they are not helpers of the test's commands
+TEST_CASE_METHODS = frozenset(
+    ['run', 'setUp', 'tearDown', 'setUpClass', 'tearDownClass'])
+
+
+def issuing_helpers() -> t.Tuple[str, ...]:
+    """Names of the public puppetmaster functions on the stack, outermost first"""
+    helpers: t.Dict[str, None] = {}
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if (os.path.abspath(code.co_filename).startswith(PACKAGE_DIR)
+                and not code.co_name.startswith(('_', '<'))
+                and code.co_name not in TEST_CASE_METHODS):
+            helpers[code.co_name] = None
+        frame = frame.f_back  # type: ignore
+    return tuple(reversed(list(helpers)))
+
+
+class CommandStats:
+    def __init__(self) -> None:
+        self.round_trips = 0
+        self.total_time = 0.0
+
+    def add(self, round_trips: int, total_time: float) -> None:
+        self.round_trips += round_trips
+        self.total_time += total_time
+
+    def as_dict(self) -> t.Dict[str, float]:
+        return {'round_trips': self.round_trips, 'total_time': self.total_time}
+
+
+class ProfileScope:
+    """Command statistics of a test or a test class.
+
+    Helper time is inclusive: a command issued by `fill_input` called from
+    `fill_form` counts towards both helpers.
+    """
+
+    def __init__(self) -> None:
+        self.total = CommandStats()
+        self.helpers: t.Dict[str, CommandStats] = {}
+        self.commands: t.Dict[str, CommandStats] = {}
+
+    def record(self,
+               command: str,
+               duration: float,
+               helpers: t.Sequence[str]) -> None:
+        self.total.add(1, duration)
+        self.commands.setdefault(command, CommandStats()).add(1, duration)
+        for helper in helpers or [NO_HELPER]:
+            self.helpers.setdefault(helper, CommandStats()).add(1, duration)
+
+    def merge(self, other: 'ProfileScope') -> None:
+        self.total.add(other.total.round_trips, other.total.total_time)
+        for name, stats in other.helpers.items():
+            self.helpers.setdefault(name, CommandStats()).add(
+                stats.round_trips, stats.total_time)
+        for name, stats in other.commands.items():
+            self.commands.setdefault(name, CommandStats()).add(
+                stats.round_trips, stats.total_time)
+
+    def top_helpers(self, key: str) -> t.List[t.Tuple[str, CommandStats]]:
+        return sorted(self.helpers.items(),
+                      key=lambda item: getattr(item[1], key),
+                      reverse=True)[:REPORT_TOP_HELPERS]
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            **self.total.as_dict(),
+            'helpers': {name: s.as_dict() for name, s in self.helpers.items()},
+            'commands': {name: s.as_dict() for name, s in self.commands.items()},
+        }
+
+    def as_text(self, title: str) -> str:
+        lines = [f'{title}: {self.total.round_trips} round trips, '
+                 f'{self.total.total_time:.3f}s']
+        for key, label in [('total_time', 'total time'),
+                           ('round_trips', 'round trips')]:
+            lines.append(f'  Top helpers by {label}:')
+            for name, stats in self.top_helpers(key):
+                lines.append(f'    {name:<40} {stats.total_time:>9.3f}s '
+                             f'{stats.round_trips:>7} round trips')
+        return '\n'.join(lines)
+
+
+class DriverProfiler:
+    """Records every WebDriver command sent by instrumented drivers"""
+
+    def __init__(self) -> None:
+        self.current_test = NO_TEST
+        self.tests: t.Dict[str, ProfileScope] = {}
+        self._lock = threading.Lock()
+
+    def start_test(self, test_id: str) -> None:
+        self.current_test = test_id
+
+    def instrument(self, driver: webdriver.Remote) -> webdriver.Remote:
+        # Element commands go through the parent driver, so this sees them too
+        execute = driver.execute
+
+        def _profiled_execute(driver_command: str, params=None):
+            helpers = issuing_helpers()
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.record(driver_command, time.perf_counter() - start, helpers)
+
+        driver.execute = _profiled_execute
+        return driver
+
+    def record(self,
+               command: str,
+               duration: float,
+               helpers: t.Sequence[str]) -> None:
+        with self._lock:
+            scope = self.tests.setdefault(self.current_test, ProfileScope())
+            scope.record(command, duration, helpers)
+
+    def classes(self) -> t.Dict[str, ProfileScope]:
+        classes: t.Dict[str, ProfileScope] = {}
+        for test_id, scope in self.tests.items():
+            class_id = test_id.rsplit('.', 1)[0]
+            classes.setdefault(class_id, ProfileScope()).merge(scope)
+        return classes
+
+    def report(self) -> t.Dict[str, t.Any]:
+        with self._lock:
+            return {
+                'tests': {name: s.as_dict() for name, s in self.tests.items()},
+                'classes': {name: s.as_dict()
+                            for name, s in self.classes().items()},
+            }
+
+    def text_report(self) -> str:
+        with self._lock:
+            run = ProfileScope()
+            for scope in self.tests.values():
+                run.merge(scope)
+            sections = [run.as_text('Whole run')]
+            sections += [scope.as_text(f'Class {name}')
+                         for name, scope in sorted(self.classes().items())]
+            sections += [scope.as_text(f'Test {name}')
+                         for name, scope in sorted(self.tests.items())]
+        return '\n\n'.join(sections) + '\n'
+
+    def write_report(self) -> None:
+        if not self.tests:
+            return
+        directory = getattr(settings, 'PM__PROFILE_REPORT_DIR',
+                            settings.PM__DEFAULT_SCREENSHOT_DIR)
+        basename = os.path.join(directory, f'puppet_master_profile_{os.getpid()}')
+        with open(f'{basename}.json', 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(f'{basename}.txt', 'w') as f:
+            f.write(self.text_report())
+
+
+_profiler: t.Optional[DriverProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> t.Optional[DriverProfiler]:
+    """Return the process-wide profiler, or None if profiling is disabled"""
+    global _profiler
+    if not getattr(settings, 'PM__PROFILE_DRIVER_COMMANDS', False):
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = DriverProfiler()
+            atexit.register(_profiler.write_report)
+    return _profiler
@@ -0,0 +1,212 @@
+import atexit
+import collections
+import http.client
+import http.server
+import mimetypes
+import select
+import socket
+import socketserver
+import threading
+import typing as t
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.webdriver.common.proxy import Proxy, ProxyType
+
+from .drivers import browser_name
+
+# Hosts the browser reaches directly, e.g. the live server
+LOOPBACK_HOSTS = ['localhost', '127.0.0.1']
+PROXY_HOST = '127.0.0.1'
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection',
+                      'proxy-authorization', 'te', 'trailers',
+                      'transfer-encoding', 'upgrade'}
+UPSTREAM_TIMEOUT = 30
+# Default estimate of how long a blocked request would have stalled without
+# network access, in seconds
+DEFAULT_STALL_TIME = 20.0
+
+
+class ProxyBlockModes:
+    # Answer blocked requests with an empty 200 response of a matching type
+    Stub = 'stub'
+    # Refuse blocked requests with a 403
+    Block = 'block'
+
+
+class ProxyStats:
+    def __init__(self, stall_time: float) -> None:
+        self.stall_time = stall_time
+        self.forwarded = 0
+        self.blocked: t.Counter[str] = collections.Counter()
+
+    @property
+    def saved_time(self) -> t.Dict[str, float]:
+        """Estimated stall time avoided per blocked host, in seconds"""
+        return {host: count * self.stall_time
+                for host, count in self.blocked.items()}
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'forwarded': self.forwarded,
+            'blocked': dict(self.blocked),
+            'saved_time': self.saved_time,
+        }
+
+    def __repr__(self) -> str:
+        return f'ProxyStats({self.as_dict()})'
+
+
+def relay(client: socket.socket, upstream: socket.socket) -> None:
+    sockets = [client, upstream]
+    while True:
+        readable, _, _ = select.select(sockets, [], [], UPSTREAM_TIMEOUT)
+        if not readable:
+            return
+        for sock in readable:
+            data = sock.recv(65536)
+            if not data:
+                return
+            (upstream if sock is client else client).sendall(data)
+
+
+class BlockingProxyHandler(http.server.BaseHTTPRequestHandler):
+    server: 'BlockingProxy'
+
+    def do_CONNECT(self) -> None:
+        host, _, port = self.path.rpartition(':')
+        if not self.server.allow(host):
+            # XXX: HTTPS content cannot be stubbed without intercepting TLS
+            self.send_error(403)
+            return
+        try:
+            upstream = socket.create_connection((host, int(port)), UPSTREAM_TIMEOUT)
+        except OSError:
+            self.send_error(502)
+            return
+        with upstream:
+            self.send_response(200, 'Connection established')
+            self.end_headers()
+            relay(self.connection, upstream)
+
+    def forward(self) -> None:
+        url = urlsplit(self.path)
+        host = url.hostname or ''
+        if not self.server.allow(host):
+            self.send_blocked(url.path)
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else None
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP_HEADERS}
+        path = url.path + (f'?{url.query}' if url.query else '')
+        connection = http.client.HTTPConnection(
+            host, url.port or 80, timeout=UPSTREAM_TIMEOUT)
+        try:
+            connection.request(self.command, path or '/', body, headers)
+            response = connection.getresponse()
+            content = response.read()
+        except OSError:
+            self.send_error(502)
+            return
+        finally:
+            connection.close()
+
+        self.send_response(response.status, response.reason)
+        for name, value in response.getheaders():
+            if name.lower() not in HOP_BY_HOP_HEADERS | {'content-length'}:
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = forward
+    do_HEAD = do_OPTIONS = forward
+
+    def send_blocked(self, path: str) -> None:
+        if self.server.block_mode == ProxyBlockModes.Block:
+            self.send_error(403)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type',
+                         mimetypes.guess_type(path)[0] or 'text/plain')
+        self.send_header('Content-Length', '0')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class BlockingProxy(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Local HTTP proxy forwarding requests to allowed hosts only.
+
+    Every other request is answered right away, so pages do not stall on
+    analytics, web fonts or CDNs when there is no network.
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 allowed_hosts: t.Iterable[str],
+                 block_mode: str = ProxyBlockModes.Stub,
+                 stall_time: float = DEFAULT_STALL_TIME) -> None:
+        super().__init__((PROXY_HOST, 0), BlockingProxyHandler)
+        self.allowed_hosts = set(allowed_hosts) | set(LOOPBACK_HOSTS)
+        self.block_mode = block_mode
+        self.stats = ProxyStats(stall_time)
+        self._lock = threading.Lock()
+
+    @property
+    def address(self) -> str:
+        return f'{PROXY_HOST}:{self.server_port}'
+
+    def allow(self, host: str) -> bool:
+        allowed = host in self.allowed_hosts
+        with self._lock:
+            if allowed:
+                self.stats.forwarded += 1
+            else:
+                self.stats.blocked[host] += 1
+        return allowed
+
+    def start(self) -> None:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def capabilities(self, driver: t.Callable[..., webdriver.Remote]) -> t.Dict:
+        """Default capabilities of the driver class, routed through the proxy"""
+        browser = browser_name(driver)
+        capabilities = (dict(getattr(webdriver.DesiredCapabilities, browser.upper()))
+                        if browser is not None else {})
+        Proxy({
+            'proxyType': ProxyType.MANUAL,
+            'httpProxy': self.address,
+            'sslProxy': self.address,
+            'noProxy': ','.join(LOOPBACK_HOSTS),
+        }).add_to_capabilities(capabilities)
+        return capabilities
+
+
+_proxy: t.Optional[BlockingProxy] = None
+_proxy_lock = threading.Lock()
+
+
+def get_blocking_proxy() -> t.Optional[BlockingProxy]:
+    """Return the process-wide proxy, or None if blocking is disabled"""
+    global _proxy
+    if not getattr(settings, 'PM__BLOCK_THIRD_PARTY_REQUESTS', False):
+        return None
+    with _proxy_lock:
+        if _proxy is None:
+            service_host = urlsplit(getattr(settings, 'PM__SERVICE_URL', '')).hostname
+            allowed_hosts = list(getattr(settings, 'PM__PROXY_ALLOWED_HOSTS', []))
+            _proxy = BlockingProxy(
+                allowed_hosts + ([service_host] if service_host else []),
+                getattr(settings, 'PM__PROXY_BLOCK_MODE', ProxyBlockModes.Stub),
+                getattr(settings, 'PM__PROXY_STALL_TIME', DEFAULT_STALL_TIME))
+            _proxy.start()
+            atexit.register(_proxy.shutdown)
+    return _proxy
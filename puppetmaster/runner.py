@@ -0,0 +1,169 @@
+import argparse
+import os
+import typing as t
+import unittest
+from multiprocessing.util import Finalize
+
+from django.conf import settings
+from django.test import runner as django_runner
+from django.test.runner import DiscoverRunner, ParallelTestSuite
+
+from .artifacts import flush_artifact_writer
+from .launcher import get_browser_launcher
+from .pool import get_driver_pool
+from .profiler import get_profiler
+from .timings import (
+    Timings,
+    get_timing_recorder,
+    longest_first,
+    split_shards,
+    test_class_id)
+
+
+def get_worker_id() -> int:
+    """Return the id of the current test worker, 0 outside of parallel runs"""
+    return django_runner._worker_id
+
+
+def _close_driver_pool() -> None:
+    pool = get_driver_pool()
+    if pool is not None:
+        pool.close()
+
+
+def _close_browser_launcher() -> None:
+    launcher = get_browser_launcher()
+    if launcher is not None:
+        launcher.close()
+
+
+def _write_timings() -> None:
+    recorder = get_timing_recorder()
+    if recorder is not None:
+        recorder.write()
+
+
+def _write_profile_report() -> None:
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.write_report()
+
+
+def _init_worker(counter) -> None:
+    """Prepare a worker process for running Selenium tests.
+
+    On top of Django's own setup (a cloned test database per worker) every
+    worker gets a separate screenshot directory, and on exit it writes its own
+    profile report and timings, flushes failure artifacts and closes its pooled
+    and spare drivers. Live servers already bind to a free port per process.
+    """
+    django_runner._init_worker(counter)
+
+    screenshot_dir = os.path.join(settings.PM__DEFAULT_SCREENSHOT_DIR,
+                                  f'worker_{get_worker_id()}', '')
+    os.makedirs(screenshot_dir, exist_ok=True)
+    settings.PM__DEFAULT_SCREENSHOT_DIR = screenshot_dir
+
+    # XXX: multiprocessing workers leave through os._exit, skipping atexit
+    Finalize(None, _close_driver_pool, exitpriority=10)
+    Finalize(None, _close_browser_launcher, exitpriority=10)
+    Finalize(None, _write_profile_report, exitpriority=10)
+    Finalize(None, _write_timings, exitpriority=10)
+    Finalize(None, flush_artifact_writer, exitpriority=10)
+
+
+def parse_shard(shard: str) -> t.Tuple[int, int]:
+    """Parse INDEX/COUNT, INDEX counting from 1"""
+    try:
+        index, count = map(int, shard.split('/'))
+    except ValueError:
+        raise ValueError(f'Shard must be INDEX/COUNT, e.g. 1/4, not {shard!r}.')
+    if not 1 <= index <= count:
+        raise ValueError(f'Shard index must be between 1 and COUNT, not {shard!r}.')
+    return index, count
+
+
+def shard_argument(shard: str) -> str:
+    try:
+        parse_shard(shard)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return shard
+
+
+def iter_tests(suite: unittest.TestSuite) -> t.Iterator[unittest.TestCase]:
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+class PuppetMasterParallelTestSuite(ParallelTestSuite):
+    init_worker = _init_worker
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Start the longest classes first, so no worker is left running one
+        # long class after the others are done
+        timings = Timings.load()
+        self.subsuites: t.List[unittest.TestSuite] = longest_first(
+            self.subsuites, timings.suite_duration)
+
+
+class PuppetMasterTestRunner(DiscoverRunner):
+    """Test runner spreading test classes over worker processes.
+
+    With `--shard INDEX/COUNT` only the INDEX-th (counting from 1) of COUNT
+    groups of test classes with similar recorded durations is run, e.g. to
+    split a run over several CI machines.
+
+    Usage:
+    TEST_RUNNER = 'puppetmaster.runner.PuppetMasterTestRunner'
+    ./manage.py test --parallel 4
+    """
+    parallel_test_suite = PuppetMasterParallelTestSuite
+    parallel: int
+
+    def __init__(self,
+                 parallel: int = 0,
+                 shard: t.Optional[str] = None,
+                 **kwargs) -> None:
+        if parallel <= 1:
+            parallel = getattr(settings, 'PM__TEST_PROCESSES', parallel)
+        super().__init__(parallel=parallel, **kwargs)
+        self.shard = parse_shard(shard) if shard is not None else None
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--shard', metavar='INDEX/COUNT', type=shard_argument,
+            help='Run the INDEX-th of COUNT shards of similar duration.')
+
+    def build_suite(self, *args, **kwargs) -> unittest.TestSuite:
+        suite = super().build_suite(*args, **kwargs)
+        if self.shard is None:
+            return suite
+        index, count = self.shard
+        if isinstance(suite, ParallelTestSuite):
+            suite = self.test_suite(suite.subsuites)
+        tests = list(iter_tests(suite))
+        classes: t.Dict[str, t.List[unittest.TestCase]] = {}
+        for test in tests:
+            classes.setdefault(test_class_id(type(test)), []).append(test)
+        timings = Timings.load()
+        shards = split_shards(
+            classes, count,
+            lambda class_id: timings.suite_duration(classes[class_id]))
+        selected = set(shards[index - 1])
+        suite = self.test_suite(test for test in tests
+                                if test_class_id(type(test)) in selected)
+        if self.parallel > 1:
+            # As DiscoverRunner.build_suite does, for the selected classes
+            parallel_suite = self.parallel_test_suite(
+                suite, self.parallel, self.failfast)
+            self.parallel = min(self.parallel, len(parallel_suite.subsuites))
+            if self.parallel > 1:
+                suite = parallel_suite
+        return suite
@@ -0,0 +1,61 @@
+import threading
+import time
+import typing as t
+
+Cookie = t.Dict[str, t.Any]
+SessionKey = t.Tuple[str, str]
+
+# Cookie fields accepted by WebDriver's add_cookie across drivers
+COOKIE_FIELDS = ('name', 'value', 'path', 'secure', 'httpOnly', 'expiry')
+
+
+class SessionCacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def as_dict(self) -> t.Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'expired': self.expired}
+
+    def __repr__(self) -> str:
+        return f'SessionCacheStats({self.as_dict()})'
+
+
+class SessionCache:
+    """Authenticated session cookies keyed by (username, service URL)"""
+
+    def __init__(self) -> None:
+        self.stats = SessionCacheStats()
+        self._sessions: t.Dict[SessionKey, t.List[Cookie]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: SessionKey) -> t.Optional[t.List[Cookie]]:
+        with self._lock:
+            cookies = self._sessions.get(key)
+            if cookies is None:
+                self.stats.misses += 1
+                return None
+            if any(cookie.get('expiry', float('inf')) <= time.time()
+                   for cookie in cookies):
+                self.stats.expired += 1
+                del self._sessions[key]
+                return None
+            self.stats.hits += 1
+            return cookies
+
+    def store(self, key: SessionKey, cookies: t.Iterable[Cookie]) -> None:
+        with self._lock:
+            self._sessions[key] = [
+                {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+                for cookie in cookies
+            ]
+
+    def invalidate(self, key: SessionKey) -> None:
+        """Forget a session which turned out to be no longer valid"""
+        with self._lock:
+            if self._sessions.pop(key, None) is not None:
+                self.stats.expired += 1
+
+
+session_cache = SessionCache()
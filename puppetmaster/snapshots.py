@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import typing as t
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class DatabaseSnapshot:
+    """Copy of the database content which can be restored before each test"""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def capture(self) -> None:
+        raise NotImplementedError
+
+    def restore(self) -> None:
+        raise NotImplementedError
+
+
+class SqliteSnapshot(DatabaseSnapshot):
+    """Snapshot kept in a separate in-memory database via the SQLite backup API"""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        super().__init__(using)
+        self.snapshot = sqlite3.connect(':memory:', check_same_thread=False)
+
+    def capture(self) -> None:
+        self.connection.ensure_connection()
+        self.connection.connection.backup(self.snapshot)
+
+    def restore(self) -> None:
+        self.connection.ensure_connection()
+        self.snapshot.backup(self.connection.connection)
+
+
+class SerializedSnapshot(DatabaseSnapshot):
+    """Snapshot serialized with Django's test database serializer.
+
+    Works with every backend, but restoring goes through the ORM. Expects the
+    tables to be empty, as they are after a TransactionTestCase flush.
+    """
+    data = ''
+
+    def capture(self) -> None:
+        self.data = self.connection.creation.serialize_db_to_string()
+
+    def restore(self) -> None:
+        self.connection.creation.deserialize_db_from_string(self.data)
+        # XXX: Rows are restored with explicit primary keys, so sequences have
+        # to be moved past them before new rows get created.
+        statements = self.connection.ops.sequence_reset_sql(
+            no_style(), apps.get_models())
+        if statements:
+            with self.connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+
+def create_snapshot(using: str = DEFAULT_DB_ALIAS) -> DatabaseSnapshot:
+    connection = connections[using]
+    if (connection.vendor == 'sqlite'
+            and hasattr(sqlite3.Connection, 'backup')
+            and not connection.in_atomic_block):
+        return SqliteSnapshot(using)
+    return SerializedSnapshot(using)
+
+
+class SeedTimings:
+    def __init__(self) -> None:
+        self.seeds = 0
+        self.seed_time = 0.0
+        self.restores = 0
+        self.restore_time = 0.0
+
+    @property
+    def saved_time(self) -> float:
+        """Estimated time saved by restoring instead of reseeding, in seconds"""
+        if not self.seeds:
+            return 0.0
+        return self.restores * self.seed_time / self.seeds - self.restore_time
+
+    def as_dict(self) -> t.Dict[str, float]:
+        return {
+            'seeds': self.seeds,
+            'seed_time': self.seed_time,
+            'restores': self.restores,
+            'restore_time': self.restore_time,
+            'saved_time': self.saved_time,
+        }
+
+    def __repr__(self) -> str:
+        return f'SeedTimings({self.as_dict()})'
+
+
+# Snapshots and timings per test class name
+database_snapshots: t.Dict[str, DatabaseSnapshot] = {}
+seed_timings: t.Dict[str, SeedTimings] = {}
+snapshots_lock = threading.Lock()
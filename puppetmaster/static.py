@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import typing as t
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.http import HttpResponse, HttpResponseNotModified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Same defaults as collectstatic
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 1024
+
+
+def accepted_encodings(request) -> t.Set[str]:
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {part.split(';')[0].strip() for part in header.split(',')}
+
+
+class StaticAsset:
+    """Static file kept in memory with its precompressed variants"""
+
+    def __init__(self, path: str, content: bytes) -> None:
+        self.content_type = (mimetypes.guess_type(path)[0]
+                             or 'application/octet-stream')
+        self.etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        self.variants = {'identity': content}
+        if (len(content) >= MIN_COMPRESS_SIZE
+                and self.content_type.startswith(COMPRESSIBLE_TYPES)):
+            self.variants['gzip'] = gzip.compress(content)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(content, quality=5)
+
+    def response(self, request) -> HttpResponse:
+        if self.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            accepted = accepted_encodings(request)
+            encoding = next((encoding for encoding in ['br', 'gzip']
+                             if encoding in accepted and encoding in self.variants),
+                            'identity')
+            response = HttpResponse(self.variants[encoding],
+                                    content_type=self.content_type)
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+            response['Content-Length'] = len(self.variants[encoding])
+        response['ETag'] = self.etag
+        # Let the browser cache assets, but revalidate them on every load
+        response['Cache-Control'] = 'no-cache'
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class StaticIndexStats:
+    def __init__(self) -> None:
+        self.served = 0
+        self.not_modified = 0
+        # Requests for files missing from the index, served from disk
+        self.fallbacks = 0
+
+    def as_dict(self) -> t.Dict[str, int]:
+        return {
+            'served': self.served,
+            'not_modified': self.not_modified,
+            'fallbacks': self.fallbacks,
+        }
+
+    def __repr__(self) -> str:
+        return f'StaticIndexStats({self.as_dict()})'
+
+
+class StaticAssetIndex:
+    def __init__(self) -> None:
+        self.assets: t.Dict[str, StaticAsset] = {}
+        self.stats = StaticIndexStats()
+        self._built = False
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def build(self) -> None:
+        """Load every asset found by the staticfiles finders, once per process"""
+        with self._lock:
+            if self._built:
+                return
+            for finder in finders.get_finders():
+                for path, storage in finder.list(IGNORE_PATTERNS):
+                    # Prefixed STATICFILES_DIRS entries are served under their
+                    # prefix, as collectstatic does
+                    prefix = getattr(storage, 'prefix', None)
+                    prefixed_path = os.path.join(prefix, path) if prefix else path
+                    # The first finder providing a path wins, as in find()
+                    if prefixed_path not in self.assets:
+                        with storage.open(path) as f:
+                            self.assets[prefixed_path] = StaticAsset(path, f.read())
+            self._built = True
+
+    def get(self, path: str) -> t.Optional[StaticAsset]:
+        return self.assets.get(path)
+
+    def count(self, counter: str) -> None:
+        """Increment a StaticIndexStats counter, from any server thread"""
+        with self._stats_lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+
+static_index = StaticAssetIndex()
+
+
+class CachedStaticFilesHandler(StaticFilesHandler):
+    """Serves static files from `static_index`, falling back to the disk for
+    files added after the index was built.
+    """
+
+    def serve(self, request):
+        asset = static_index.get(self.file_path(request.path))
+        if asset is None:
+            static_index.count('fallbacks')
+            return super().serve(request)
+        response = asset.response(request)
+        static_index.count('not_modified' if response.status_code == 304
+                           else 'served')
+        return response
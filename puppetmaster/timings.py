@@ -0,0 +1,157 @@
+import atexit
+import json
+import os
+import statistics
+import tempfile
+import threading
+import typing as t
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+T = t.TypeVar('T')
+PhaseTimes = t.Dict[str, float]
+
+# Estimated duration of a test in seconds when nothing has been recorded yet
+DEFAULT_TEST_DURATION = 10.0
+
+
+def test_class_id(test_class: type) -> str:
+    return f'{test_class.__module__}.{test_class.__qualname__}'
+
+
+def total(times: PhaseTimes) -> float:
+    return sum(times.values())
+
+
+class TimingRecorder:
+    """Records the wall time of tests and test classes per phase.
+
+    Test phases are setUp, the test method and tearDown, class phases are
+    setUpClass and tearDownClass. Timings are merged into the timings file,
+    so tests which did not run keep their earlier timings.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tests: t.Dict[str, PhaseTimes] = {}
+        self.classes: t.Dict[str, PhaseTimes] = {}
+        self._lock = threading.Lock()
+
+    def record_test(self, test_id: str, phase: str, duration: float) -> None:
+        with self._lock:
+            self.tests.setdefault(test_id, {})[phase] = duration
+
+    def record_class(self, class_id: str, phase: str, duration: float) -> None:
+        with self._lock:
+            self.classes.setdefault(class_id, {})[phase] = duration
+
+    def write(self) -> None:
+        if not self.tests and not self.classes:
+            return
+        # XXX: Parallel workers all write to the same file when they exit,
+        # the lock keeps them from dropping each other's timings.
+        with open(f'{self.path}.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            data = read_timings(self.path)
+            with self._lock:
+                data['tests'].update(self.tests)
+                data['classes'].update(self.classes)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=directory, delete=False, suffix='.tmp') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(f.name, self.path)
+
+
+def read_timings(path: str) -> t.Dict[str, t.Dict[str, PhaseTimes]]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    return {'tests': data.get('tests', {}), 'classes': data.get('classes', {})}
+
+
+class Timings:
+    """Recorded timings used to estimate how long tests will take.
+
+    Tests without timings are estimated as the median recorded test, or
+    DEFAULT_TEST_DURATION when there are no timings at all.
+    """
+
+    def __init__(self,
+                 tests: t.Dict[str, PhaseTimes],
+                 classes: t.Dict[str, PhaseTimes]) -> None:
+        self.tests = {test_id: total(times) for test_id, times in tests.items()}
+        self.classes = {class_id: total(times)
+                        for class_id, times in classes.items()}
+        self.default_test_duration = (statistics.median(self.tests.values())
+                                      if self.tests else DEFAULT_TEST_DURATION)
+
+    @classmethod
+    def load(cls, path: t.Optional[str] = None) -> 'Timings':
+        path = path or getattr(settings, 'PM__TIMINGS_FILE', None)
+        if not path:
+            return cls({}, {})
+        data = read_timings(path)
+        return cls(data['tests'], data['classes'])
+
+    def test_duration(self, test_id: str) -> float:
+        return self.tests.get(test_id, self.default_test_duration)
+
+    def suite_duration(self, tests: t.Iterable[t.Any]) -> float:
+        """Estimated duration of the tests, with setUpClass and tearDownClass
+        of each of their classes
+        """
+        duration = 0.0
+        classes = set()
+        for test in tests:
+            duration += self.test_duration(test.id())
+            classes.add(test_class_id(type(test)))
+        return duration + sum(self.classes.get(class_id, 0.0)
+                              for class_id in classes)
+
+
+def longest_first(items: t.Iterable[T],
+                  duration: t.Callable[[T], float]) -> t.List[T]:
+    return sorted(items, key=duration, reverse=True)
+
+
+def split_shards(items: t.Iterable[T],
+                 shards: int,
+                 duration: t.Callable[[T], float]) -> t.List[t.List[T]]:
+    """Split items into `shards` groups of similar total duration.
+
+    Items are assigned longest-first, each to the group with the smallest
+    total so far.
+    """
+    groups: t.List[t.List[T]] = [[] for _ in range(shards)]
+    totals = [0.0] * shards
+    for item in longest_first(items, duration):
+        index = totals.index(min(totals))
+        groups[index].append(item)
+        totals[index] += duration(item)
+    return groups
+
+
+_recorder: t.Optional[TimingRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_timing_recorder() -> t.Optional[TimingRecorder]:
+    """Return the process-wide recorder, or None if PM__TIMINGS_FILE is unset"""
+    global _recorder
+    path = getattr(settings, 'PM__TIMINGS_FILE', None)
+    if not path:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = TimingRecorder(path)
+            atexit.register(_recorder.write)
+    return _recorder
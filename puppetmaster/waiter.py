@@ -1,27 +1,199 @@
-import os
-import itertools
+import collections
+import time
 import typing as t
+import weakref
 
 from django.conf import settings
 from selenium import webdriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import (
     TimeoutException,
-    StaleElementReferenceException)
+    StaleElementReferenceException,
+    WebDriverException)
 
-from .core import BasePuppetMaster
+from .artifacts import ArtifactKinds, get_artifact_writer
+from .base import BasePuppetMaster
 
 STALE_ELEMENT_DEFAULT_RETRIES = 3
 
+# Stale element retries per wait condition (selector or condition name),
+# useful for finding flaky waits
+stale_element_retries: t.Counter[str] = collections.Counter()
+
+# Script timeout set on each driver by Observer waits
+script_timeouts: 'weakref.WeakKeyDictionary[webdriver.Remote, float]' = (
+    weakref.WeakKeyDictionary())
+
+OBSERVE_CONDITION_SCRIPT = """
+var selector = arguments[0], text = arguments[1], many = arguments[2];
+var timeout = arguments[3], done = arguments[arguments.length - 1];
+var finished = false, observer, timer;
+
+function contains(el) {
+  return text === null || el.innerText.indexOf(text) !== -1;
+}
+
+function check() {
+  if (!many) {
+    var el = document.querySelector(selector);
+    return el && contains(el) ? el : null;
+  }
+  var els = Array.prototype.slice.call(document.querySelectorAll(selector));
+  if (text === null) {
+    return els.length ? els : null;
+  }
+  return els.filter(contains)[0] || null;
+}
+
+function finish(result) {
+  if (finished) {
+    return;
+  }
+  finished = true;
+  if (observer) {
+    observer.disconnect();
+  }
+  clearTimeout(timer);
+  done(result);
+}
+
+var result = check();
+if (result) {
+  finish(result);
+} else {
+  observer = new MutationObserver(function () {
+    var result = check();
+    if (result) {
+      finish(result);
+    }
+  });
+  observer.observe(document.documentElement, {
+    childList: true, subtree: true, attributes: true, characterData: true
+  });
+  timer = setTimeout(function () { finish(null); }, timeout);
+}
+"""
+
+
+class WaitBackends:
+    # WebDriverWait polling the condition every 50 ms
+    Polling = 'polling'
+    # MutationObserver installed with a single `execute_async_script`,
+    # used for BrowserCondition waits
+    Observer = 'observer'
+
+
+class BrowserCondition(t.NamedTuple):
+    """Wait condition which can be evaluated inside the browser.
+
+    Matches the first element for `selector` (or all of them if `many` is
+    set), optionally requiring `text` in the element's text. Calling it with a
+    driver evaluates the same condition through WebDriver for polling.
+    """
+    selector: str
+    text: t.Optional[str] = None
+    many: bool = False
+
+    def __call__(self, driver: webdriver.Remote) -> t.Any:
+        if not self.many:
+            element = driver.find_element_by_css_selector(self.selector)
+            return element if self.contains(element) else False
+        elements = driver.find_elements_by_css_selector(self.selector)
+        if self.text is None:
+            return elements
+        return next(filter(self.contains, elements), False)
+
+    def contains(self, element) -> bool:
+        return self.text is None or self.text in element.text
+
+
+class OnPage(t.NamedTuple):
+    """Condition met when the browser is on `url_path` of the server"""
+    url_path: str
+
+
+class InPageSource(t.NamedTuple):
+    """Condition met when the page source contains `text` (or matches it)"""
+    text: str
+    regex: bool = False
+
+
+CompositeCondition = t.Union[BrowserCondition, OnPage, InPageSource]
+
+# Evaluates every condition of `wait_all` in a single round trip, with the same
+# semantics as BrowserCondition, AssertionsMixin.assert_on_page and
+# SEARCH_PAGE_SOURCE_SCRIPT.
+CHECK_CONDITIONS_SCRIPT = """
+var conditions = arguments[0], serverUrl = arguments[1], source = null;
+
+function contains(el, text) {
+  return text === null || el.innerText.indexOf(text) !== -1;
+}
+
+return conditions.map(function (condition) {
+  if (condition.kind === 'url') {
+    return window.location.href === serverUrl + condition.urlPath;
+  }
+  if (condition.kind === 'source') {
+    source = source || document.documentElement.outerHTML;
+    return condition.regex ? new RegExp(condition.text).test(source)
+      : source.indexOf(condition.text) !== -1;
+  }
+  if (!condition.many) {
+    var el = document.querySelector(condition.selector);
+    return Boolean(el && contains(el, condition.text));
+  }
+  return Array.prototype.some.call(
+    document.querySelectorAll(condition.selector),
+    function (el) { return contains(el, condition.text); });
+});
+"""
+
+
+def serialize_condition(condition: CompositeCondition) -> t.Dict[str, t.Any]:
+    if isinstance(condition, OnPage):
+        return {'kind': 'url', 'urlPath': condition.url_path}
+    if isinstance(condition, InPageSource):
+        return {'kind': 'source', 'text': condition.text, 'regex': condition.regex}
+    return {'kind': 'selector', 'selector': condition.selector,
+            'text': condition.text, 'many': condition.many}
+
+
+def describe_composite(condition: CompositeCondition) -> str:
+    if isinstance(condition, OnPage):
+        return f'on page "{condition.url_path}"'
+    if isinstance(condition, InPageSource):
+        kind = 'pattern' if condition.regex else 'text'
+        return f'{kind} "{condition.text}" in page source'
+    if condition.text is None:
+        return f'element {condition.selector}'
+    return f'"{condition.text}" in {condition.selector}'
+
+
+class ConditionsTimeoutException(TimeoutException):
+    def __init__(self, failing: t.Sequence[CompositeCondition]) -> None:
+        self.failing = list(failing)
+        super().__init__('Conditions not met: '
+                         + ', '.join(map(describe_composite, failing)))
+
+
+WaitCondition = t.Union[t.Callable[[webdriver.Remote], t.Any], BrowserCondition]
+
+
+def describe_condition(condition: WaitCondition) -> str:
+    if isinstance(condition, BrowserCondition):
+        return condition.selector
+    return getattr(condition, '__qualname__', repr(condition))
+
 
 class WaiterInterface(BasePuppetMaster):
     def _wait(self,
-              condition: t.Callable[[webdriver.Remote], t.Any],
-              timeout: int) -> WebDriverWait:
+              condition: WaitCondition,
+              timeout: float) -> WebDriverWait:
         raise NotImplementedError
 
     def wait(self,
-             condition: t.Callable[[webdriver.Remote], t.Any],
+             condition: WaitCondition,
              timeout: int = 1) -> WebDriverWait:
         raise NotImplementedError
 
@@ -31,47 +203,148 @@ class WaiterInterface(BasePuppetMaster):
     def wait_for_element(self, selector: str, timeout: int = 1) -> WebDriverWait:
         raise NotImplementedError
 
-    def make_screenshot(self, id_iter: t.Iterator[int] = itertools.count(0)):
+    def wait_all(self, *conditions: CompositeCondition, timeout: int = 1) -> None:
+        raise NotImplementedError
+
+    def make_screenshot(self,
+                        id_iter: t.Optional[t.Iterator[int]] = None
+                        ) -> t.Optional[str]:
         raise NotImplementedError
 
 
 class WaiterMixin(WaiterInterface):
-    def make_screenshot(self, id_iter: t.Iterator[int] = itertools.count(0)):
-        filename = (f'{settings.PM__DEFAULT_SCREENSHOT_DIR}'
-                    f'puppet_master_{os.getpid()}_{next(id_iter)}.png')
-        self.driver.get_screenshot_as_file(filename)
+    WAIT_BACKEND = WaitBackends.Polling
+    # Script timeout set on the driver by the first Observer wait and raised
+    # for longer waits. It applies to every `execute_async_script` call.
+    ASYNC_SCRIPT_TIMEOUT = 60
 
-    def _wait(self,
-              condition: t.Callable[[webdriver.Remote], t.Any],
-              timeout: int) -> WebDriverWait:
+    def capture_artifact(self, kind: str) -> bytes:
+        if kind == ArtifactKinds.Dom:
+            return self.driver.page_source.encode()
+        return self.driver.get_screenshot_as_png()
+
+    def make_screenshot(self,
+                        id_iter: t.Optional[t.Iterator[int]] = None
+                        ) -> t.Optional[str]:
+        """Capture a failure artifact and queue it for writing.
+
+        Returns the artifact filename, or None if it was a duplicate of the
+        previous one, was dropped or could not be captured.
+        """
+        kind = getattr(settings, 'PM__ARTIFACT_KIND', ArtifactKinds.Screenshot)
         try:
-            return WebDriverWait(
-                self.driver,
-                timeout=timeout,
-                poll_frequency=0.05
-            ).until(condition)
-        except TimeoutException as e:
-            # Take screenshot before failure and explicitly re-raise exception
-            self.make_screenshot()
-            raise e
+            data = self.capture_artifact(kind)
+        except WebDriverException:
+            return None
+        writer = get_artifact_writer()
+        filename = writer.filename(
+            settings.PM__DEFAULT_SCREENSHOT_DIR, type(self).__name__, kind,
+            next(id_iter) if id_iter is not None else None)
+        return writer.submit(filename, data)
+
+    def _wait_in_browser(self,
+                         condition: BrowserCondition,
+                         timeout: float) -> t.Any:
+        """Wait for the condition with a MutationObserver.
+
+        Falls back to polling if the script cannot run, e.g. when the page
+        navigates away while waiting.
+        """
+        start = time.monotonic()
+        self.ensure_script_timeout(timeout)
+        try:
+            result = self.driver.execute_async_script(
+                OBSERVE_CONDITION_SCRIPT,
+                condition.selector, condition.text, condition.many,
+                int(timeout * 1000))
+        except TimeoutException:
+            result = None
+        except WebDriverException:
+            remaining = max(timeout - (time.monotonic() - start), 0)
+            return self._poll(condition, remaining)
+
+        if not result:
+            raise TimeoutException(f'{condition} not met in {timeout:.2f}s')
+        return result
+
+    def ensure_script_timeout(self, timeout: float) -> None:
+        """Let an in-browser wait of `timeout` seconds end before WebDriver
+        gives up on the script
+        """
+        # The observer script ends itself at the timeout, allow it a second
+        needed = max(self.ASYNC_SCRIPT_TIMEOUT, timeout + 1)
+        if script_timeouts.get(self.driver, 0) < needed:
+            self.driver.set_script_timeout(needed)
+            script_timeouts[self.driver] = needed
+
+    def _wait(self,
+              condition: WaitCondition,
+              timeout: float) -> WebDriverWait:
+        if (self.WAIT_BACKEND == WaitBackends.Observer
+                and isinstance(condition, BrowserCondition)):
+            return self._wait_in_browser(condition, timeout)
+        return self._poll(condition, timeout)
+
+    def _poll(self,
+              condition: WaitCondition,
+              timeout: float) -> WebDriverWait:
+        return WebDriverWait(
+            self.driver,
+            timeout=timeout,
+            poll_frequency=0.05
+        ).until(condition)
 
     def wait(self,
-             condition: t.Callable[[webdriver.Remote], t.Any],
+             condition: WaitCondition,
              timeout: int = 1,
              max_tries: int = STALE_ELEMENT_DEFAULT_RETRIES) -> WebDriverWait:
-        if max_tries == 0:
-            raise TimeoutException
+        """Wait for the condition, retrying on stale elements.
+
+        All tries share a single deadline, so the whole wait never takes
+        longer than `timeout`.
+        """
+        deadline = time.monotonic() + timeout
         try:
-            return self._wait(condition, timeout)
-        except StaleElementReferenceException:
-            return self.wait(condition, timeout, max_tries - 1)
+            for _ in range(max_tries):
+                try:
+                    return self._wait(condition,
+                                      max(deadline - time.monotonic(), 0))
+                except StaleElementReferenceException:
+                    stale_element_retries[describe_condition(condition)] += 1
+                if time.monotonic() >= deadline:
+                    break
+            raise TimeoutException(
+                f'{describe_condition(condition)} kept going stale')
+        except TimeoutException:
+            # Take screenshot once per failed wait and re-raise exception
+            self.make_screenshot()
+            raise
 
     def wait_for_element(self, selector: str, timeout: int = 1) -> WebDriverWait:
-        return self.wait(lambda driver: driver.find_element_by_css_selector(
-            selector
-        ), timeout)
+        return self.wait(BrowserCondition(selector), timeout)
 
     def wait_for_elements(self, selector: str, timeout: int = 1) -> WebDriverWait:
-        return self.wait(lambda driver: driver.find_elements_by_css_selector(
-            selector,
-        ), timeout)
+        return self.wait(BrowserCondition(selector, many=True), timeout)
+
+    def wait_all(self, *conditions: CompositeCondition, timeout: int = 1) -> None:
+        """Wait until all conditions hold at the same time.
+
+        Every poll checks all of them with a single script call. Raises
+        ConditionsTimeoutException listing the conditions still failing at
+        the deadline.
+        """
+        serialized = [serialize_condition(condition) for condition in conditions]
+        failing: t.List[CompositeCondition] = list(conditions)
+
+        def all_met(driver: webdriver.Remote) -> bool:
+            nonlocal failing
+            results = driver.execute_script(
+                CHECK_CONDITIONS_SCRIPT, serialized, self.server_url)
+            failing = [condition for condition, met in zip(conditions, results)
+                       if not met]
+            return not failing
+
+        try:
+            self.wait(all_met, timeout=timeout)
+        except TimeoutException:
+            raise ConditionsTimeoutException(failing)
@@ -21,6 +21,22 @@ def run_mypy():
     do_call(['mypy', '.'])
 
 
+def run_unit_tests():
+    print('Run tests')
+    do_call([sys.executable, '-m', 'django', 'test', 'tests',
+             '--settings=benchmarks.settings'])
+
+
+def run_import_benchmark():
+    print('Run import time benchmark')
+    do_call([sys.executable, '-m', 'benchmarks.import_time'])
+
+
+def run_benchmarks():
+    print('Run benchmarks')
+    do_call([sys.executable, '-m', 'benchmarks', '--if-available'])
+
+
 def run_flake8():
     print('Run flake8')
     do_call(['flake8', '.'])
@@ -29,3 +45,8 @@ def run_flake8():
 if __name__ == "__main__":
     run_flake8()
     run_mypy()
+    run_unit_tests()
+    run_import_benchmark()
+    # The browser benchmarks take minutes, they only run when asked for
+    if '--benchmarks' in sys.argv[1:]:
+        run_benchmarks()
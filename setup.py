@@ -28,5 +28,9 @@ setup(
         'Programming Language :: Python :: 3.7',
     ],
     keywords='puppet selenium form filling driver',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks', 'benchmarks.*']),
+    extras_require={
+        'http': ['beautifulsoup4'],
+        'brotli': ['brotli'],
+    },
 )
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from puppetmaster.artifacts import ArtifactKinds, ArtifactWriter
+
+
+class BlockingArtifactWriter(ArtifactWriter):
+    """Writer whose thread waits for `unblock` before each write"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.writing = threading.Event()
+        self.unblock = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, filename, data):
+        self.writing.set()
+        self.unblock.wait()
+        super()._write(filename, data)
+
+
+class ArtifactWriterTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def submit(self, writer, data):
+        filename = writer.filename(self.directory, 'test', ArtifactKinds.Dom)
+        return writer.submit(filename, data)
+
+    def test_duplicates_are_skipped(self):
+        writer = ArtifactWriter(limit=10, queue_size=10)
+        first = self.submit(writer, b'first')
+        self.assertIsNone(self.submit(writer, b'first'))
+        second = self.submit(writer, b'second')
+        writer.flush()
+        self.assertEqual(writer.stats.as_dict(),
+                         {'written': 2, 'duplicates': 1, 'dropped': 0})
+        with open(first, 'rb') as f:
+            self.assertEqual(f.read(), b'first')
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), b'second')
+
+    def test_only_last_artifacts_are_kept(self):
+        writer = ArtifactWriter(limit=2, queue_size=10)
+        filenames = [self.submit(writer, f'artifact {index}'.encode())
+                     for index in range(4)]
+        writer.flush()
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted(map(os.path.basename, filenames[2:])))
+
+    def test_artifacts_are_dropped_when_queue_is_full(self):
+        writer = BlockingArtifactWriter(limit=10, queue_size=1)
+        self.assertIsNotNone(self.submit(writer, b'written'))
+        writer.writing.wait()
+        self.assertIsNotNone(self.submit(writer, b'queued'))
+        self.assertIsNone(self.submit(writer, b'dropped'))
+        writer.unblock.set()
+        writer.flush()
+        self.assertEqual(writer.stats.as_dict(),
+                         {'written': 2, 'duplicates': 0, 'dropped': 1})
+
+    def test_dropped_artifact_is_not_a_duplicate(self):
+        writer = BlockingArtifactWriter(limit=10, queue_size=1)
+        self.submit(writer, b'written')
+        writer.writing.wait()
+        self.submit(writer, b'queued')
+        self.assertIsNone(self.submit(writer, b'failure'))
+        writer.unblock.set()
+        writer.flush()
+        filename = self.submit(writer, b'failure')
+        self.assertIsNotNone(filename)
+        writer.flush()
+        self.assertEqual(writer.stats.as_dict(),
+                         {'written': 3, 'duplicates': 0, 'dropped': 1})
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), b'failure')
@@ -0,0 +1,135 @@
+import base64
+import email
+import http.client
+import http.server
+import socketserver
+import threading
+import typing as t
+from xml.dom import minidom
+
+from django.test import SimpleTestCase
+
+from puppetmaster.kobotoolbox.bulk import (
+    RecordedSubmission,
+    render_xml,
+    replay_submissions)
+
+INSTANCE_ID = 'uuid:00000000-0000-0000-0000-000000000000'
+SUBMISSION_XML = f'''<?xml version="1.0"?>
+<aForm xmlns:orx="http://openrosa.org/xforms" id="aForm">
+  <name>Recorded</name>
+  <age>30</age>
+  <orx:meta><orx:instanceID>{INSTANCE_ID}</orx:instanceID></orx:meta>
+</aForm>'''.encode()
+
+
+def recorded_submission(url: str) -> RecordedSubmission:
+    """Submission as returned by RECORDED_SUBMISSION_SCRIPT"""
+    return RecordedSubmission.from_script({
+        'method': 'POST',
+        'url': url,
+        'headers': {'X-OpenRosa-Version': '1.0',
+                    'Content-Type': 'multipart/form-data; boundary=recorded'},
+        'parts': [
+            {'name': 'xml_submission_file', 'filename': 'xml_submission_file',
+             'contentType': 'text/xml',
+             'content': base64.b64encode(SUBMISSION_XML).decode()},
+            {'name': 'photo.jpg', 'filename': 'photo.jpg',
+             'contentType': 'image/jpeg', 'content': 'AAEC'},
+        ],
+    }, [{'name': 'kobonaut', 'value': 'session'}])
+
+
+class StandInServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Records submissions, answering 500 to those named 'fail'"""
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.requests: t.List[t.Tuple[http.client.HTTPMessage, bytes]] = []
+        self.lock = threading.Lock()
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.requests.append((self.headers, body))
+        self.send_response(500 if b'<name>fail</name>' in body else 201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def parse_multipart(headers, body):
+    message = email.message_from_bytes(
+        f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body)
+    return {part.get_filename(): part.get_payload(decode=True)
+            for part in message.get_payload()}
+
+
+def element_text(document, name):
+    element = document.getElementsByTagNameNS('*', name)[0]
+    return element.firstChild.nodeValue
+
+
+class BulkSubmissionTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/submission'
+
+    def test_replay_against_stand_in_server(self):
+        rows = [{'name': f'Respondent {index}', 'age': index} for index in range(8)]
+        rows.append({'name': 'fail', 'age': 0})
+        submission = recorded_submission('https://kc.example.com/submission')
+
+        report = replay_submissions(submission, iter(rows), concurrency=3,
+                                    url=self.url)
+
+        self.assertEqual(dict(report.statuses), {201: 8, 500: 1})
+        self.assertEqual((report.submitted, report.failed, report.errors),
+                         (9, 1, 0))
+        self.assertGreater(report.throughput, 0)
+        self.assertLessEqual(report.percentile(50), report.percentile(99))
+
+        instance_ids = set()
+        submitted = {}
+        for headers, body in self.server.requests:
+            self.assertEqual(headers['X-OpenRosa-Version'], '1.0')
+            self.assertEqual(headers['Cookie'], 'kobonaut=session')
+            files = parse_multipart(headers, body)
+            self.assertEqual(files['photo.jpg'], b'\x00\x01\x02')
+            document = minidom.parseString(files['xml_submission_file'])
+            submitted[element_text(document, 'name')] = element_text(document, 'age')
+            instance_ids.add(element_text(document, 'instanceID'))
+            # Namespace prefixes are kept as recorded
+            self.assertIn(b'<orx:meta>', files['xml_submission_file'])
+        self.assertEqual(submitted, {row['name']: str(row['age']) for row in rows})
+        self.assertEqual(len(instance_ids), len(rows))
+        self.assertNotIn(INSTANCE_ID, instance_ids)
+
+    def test_unreachable_server_counts_errors(self):
+        url = self.url
+        self.server.shutdown()
+        self.server.server_close()
+        report = replay_submissions(recorded_submission(url), [{'name': 'a'}],
+                                    url=url, timeout=1)
+        self.assertEqual((report.submitted, report.errors, report.failed), (1, 1, 1))
+
+
+class RenderXmlTests(SimpleTestCase):
+    def test_default_namespace_is_kept(self):
+        content = (b'<data xmlns="http://example.com/form" id="f"><q>old</q>'
+                   b'<meta><instanceID>uuid:recorded</instanceID></meta></data>')
+        rendered = render_xml(content, {'q': 'new'})
+        self.assertIn(b'<data xmlns="http://example.com/form" id="f">', rendered)
+        self.assertIn(b'<q>new</q>', rendered)
+        self.assertNotIn(b'uuid:recorded', rendered)
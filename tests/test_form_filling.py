@@ -0,0 +1,134 @@
+import typing as t
+
+from django.test import SimpleTestCase
+
+from puppetmaster.form_filling import FillModes, FormFillingMixin
+from puppetmaster.form_schema import FormField, form_schema_cache
+
+
+class FakeElement:
+    def __init__(self, name: str, input_type: str = 'text') -> None:
+        self.attributes = {'name': name, 'type': input_type}
+        self.keys: t.List[str] = []
+        self.attribute_reads = 0
+
+    def get_attribute(self, name: str) -> t.Optional[str]:
+        self.attribute_reads += 1
+        return self.attributes.get(name)
+
+    def clear(self) -> None:
+        self.keys = []
+
+    def send_keys(self, value) -> None:
+        self.keys.append(value)
+
+
+class FakeForm:
+    def __init__(self, *inputs: FakeElement) -> None:
+        self.inputs = list(inputs)
+
+    def find_elements_by_css_selector(self, selector: str) -> t.List[FakeElement]:
+        return self.inputs if selector.startswith('input') else []
+
+
+class FormFillingTests(SimpleTestCase):
+    def test_field_named_mode_is_filled(self):
+        mode, name = FakeElement('mode'), FakeElement('name')
+        FormFillingMixin().fill_form(FakeForm(mode, name),
+                                     mode=FillModes.Batched, name='Name')
+        self.assertEqual(mode.keys, [FillModes.Batched])
+        self.assertEqual(name.keys, ['Name'])
+
+    def test_fill_mode_is_keyword_only(self):
+        with self.assertRaises(TypeError):
+            FormFillingMixin().fill_form(FakeForm(), FillModes.Default)
+
+
+class FakeScriptDriver:
+    def __init__(self, result: t.Any) -> None:
+        self.result = result
+        self.arguments: t.List[t.Any] = []
+
+    def execute_script(self, script: str, *args) -> t.Any:
+        self.arguments.append(args)
+        return self.result
+
+
+class ReactSelectTests(SimpleTestCase):
+    def test_field_named_use_filter_is_selected(self):
+        filler = FormFillingMixin()
+        filler.driver = FakeScriptDriver([['use_filter', 'selected']])
+        filler.react_select_option('select', use_filter='Yes')
+        self.assertEqual(filler.driver.arguments,
+                         [(['select'], {'use_filter': 'Yes'}, False)])
+
+    def test_filter_is_typed(self):
+        filler = FormFillingMixin()
+        filler.driver = FakeScriptDriver([['country', 'selected']])
+        filler.react_select_options(['select'], _use_filter=True, country='US')
+        self.assertEqual(filler.driver.arguments,
+                         [(['select'], {'country': 'US'}, True)])
+
+
+class FakeSnapshotDriver:
+    """Driver answering FORM_SNAPSHOT_SCRIPT for the given elements"""
+
+    def __init__(self, *elements: FakeElement) -> None:
+        self.elements = list(elements)
+        self.scripts = 0
+        self.fields_read = 0
+
+    def execute_script(self, script: str, *args) -> t.Dict[str, t.Any]:
+        self.scripts += 1
+        fingerprint = str(len(self.elements))
+        fields = None
+        if args[2].get('/form/') != fingerprint:
+            self.fields_read += 1
+            fields = [{'name': element.attributes['name'],
+                       'type': element.attributes['type']}
+                      for element in self.elements]
+        return {
+            'path': '/form/',
+            'fingerprint': fingerprint,
+            'fields': fields,
+            'elements': self.elements,
+        }
+
+
+class FormSchemaTests(SimpleTestCase):
+    def setUp(self):
+        form_schema_cache.clear()
+        self.addCleanup(form_schema_cache.clear)
+
+    def test_schema_is_read_in_one_script_call(self):
+        elements = [FakeElement('group/name'), FakeElement(''),
+                    FakeElement('agree', 'checkbox')]
+        filler = FormFillingMixin()
+        filler.driver = FakeSnapshotDriver(*elements)
+        schema, _ = filler.get_form_schema(FakeForm(), '#form')
+        self.assertEqual(schema.fields, [FormField('name', 'text', 0),
+                                         FormField('agree', 'checkbox', 2)])
+        self.assertEqual(filler.driver.scripts, 1)
+        self.assertEqual(sum(element.attribute_reads for element in elements), 0)
+
+    def test_cached_schema_is_reused(self):
+        filler = FormFillingMixin()
+        filler.driver = FakeSnapshotDriver(FakeElement('name'))
+        hits = form_schema_cache.stats.hits
+        first, _ = filler.get_form_schema(FakeForm(), '#form')
+        second, _ = filler.get_form_schema(FakeForm(), '#form')
+        self.assertIs(first, second)
+        self.assertEqual(form_schema_cache.stats.hits, hits + 1)
+        self.assertEqual(filler.driver.scripts, 2)
+        # The second snapshot only compared the fingerprint
+        self.assertEqual(filler.driver.fields_read, 1)
+
+    def test_changed_form_is_read_again(self):
+        filler = FormFillingMixin()
+        filler.driver = FakeSnapshotDriver(FakeElement('name'))
+        filler.get_form_schema(FakeForm(), '#form')
+        filler.driver.elements.append(FakeElement('age'))
+        schema, _ = filler.get_form_schema(FakeForm(), '#form')
+        self.assertEqual([field.name for field in schema.fields], ['name', 'age'])
+        self.assertEqual(filler.driver.scripts, 2)
+        self.assertEqual(filler.driver.fields_read, 2)
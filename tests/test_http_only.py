@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+
+from puppetmaster import SeleniumLiveServerTestCase
+from puppetmaster.exceptions import MissingDataException, SeleniumAssertionError
+from puppetmaster.http_only import HttpPage
+from puppetmaster.waiter import BrowserCondition, InPageSource, OnPage
+
+
+class HttpFastPathTests(SeleniumLiveServerTestCase):
+    HTTP_FAST_PATH = True
+    starting_url = '/form/3/'
+
+    def verify_email(self, user):
+        pass
+
+    def test_form_is_submitted_without_a_browser(self):
+        self.assert_on_page('/form/3/')
+        self.fill_form_and_submit('#benchmark-form',
+                                  field_0='a', field_1='b', field_2='c')
+        self.assert_on_page('/submitted/3/')
+        self.assert_in_css_selector('#result', 'Submitted 3 fields')
+        self.assert_in_page_source('Submitted 3 fields')
+        self.assertIsNone(self._driver)
+
+    def test_missing_field_is_reported(self):
+        with self.assertRaises(MissingDataException):
+            self.fill_form_and_submit('#benchmark-form', field_0='a')
+
+    def test_failed_assertions_raise(self):
+        with self.assertRaises(SeleniumAssertionError):
+            self.assert_on_page('/submitted/3/')
+        with self.assertRaises(SeleniumAssertionError):
+            self.assert_in_css_selector('#benchmark-form', 'Not on the page')
+        with self.assertRaises(SeleniumAssertionError):
+            self.assert_in_page_source('Not on the page')
+
+    def test_assert_all(self):
+        self.assert_all(OnPage('/form/3/'),
+                        InPageSource('field_2'),
+                        BrowserCondition('label', 'field_1', many=True))
+        with self.assertRaises(SeleniumAssertionError):
+            self.assert_all(OnPage('/form/3/'), InPageSource('Not on the page'))
+
+    def test_logged_in_automatically(self):
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.pk)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+
+class HttpPageTests(SimpleTestCase):
+    def form_submission(self, html, **data):
+        page = HttpPage('http://testserver/page/', f'<form id="form">{html}</form>')
+        return page.form_submission('#form', **data)
+
+    def test_submitted_values(self):
+        method, url, data = self.form_submission(
+            '<input name="text">'
+            '<input type="hidden" name="hidden" value="kept">'
+            '<input type="checkbox" name="box" value="1" checked>'
+            '<input type="radio" name="choice" value="a" checked>'
+            '<input type="radio" name="choice" value="b">'
+            '<select name="select"><option>x</option>'
+            '<option value="y" selected>Y</option></select>'
+            '<input name="disabled" disabled>'
+            '<button type="submit" name="submit">Submit</button>',
+            text='filled', box='1', choice='b')
+        self.assertEqual((method, url), ('get', 'http://testserver/page/'))
+        self.assertEqual(data, {
+            'text': ['filled'],
+            'hidden': ['kept'],
+            'box': ['1'],
+            'choice': ['b'],
+            'select': ['y'],
+        })
+
+    def test_form_action_and_method(self):
+        page = HttpPage('http://testserver/page/',
+                        '<form id="form" method="POST" action="../other/"></form>')
+        method, url, _ = page.form_submission('#form')
+        self.assertEqual((method, url), ('post', 'http://testserver/other/'))
+
+    def test_missing_form(self):
+        with self.assertRaises(SeleniumAssertionError):
+            HttpPage('http://testserver/', '<p></p>').form_submission('#form')
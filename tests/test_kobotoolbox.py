@@ -0,0 +1,61 @@
+import typing as t
+
+from django.test import SimpleTestCase
+
+from puppetmaster.kobotoolbox.core import KobotoolboxSeleniumMixin, Urls
+from puppetmaster.sessions import session_cache
+from puppetmaster.waiter import WaiterMixin
+
+
+class FakeLoginDriver:
+    """Driver staying on the login page for `redirect_after` URL reads"""
+
+    def __init__(self, redirect_after: float) -> None:
+        self.redirect_after = redirect_after
+        self.url_reads = 0
+
+    @property
+    def current_url(self) -> str:
+        self.url_reads += 1
+        if self.url_reads > self.redirect_after:
+            return 'http://kpi.test/#/forms'
+        return f'http://kpi.test{Urls.LOGIN}?next=/'
+
+    def get(self, url: str) -> None:
+        pass
+
+    def get_cookies(self) -> t.List[t.Dict[str, t.Any]]:
+        return [{'name': 'kobonaut', 'value': 'session', 'path': '/'},
+                {'name': 'csrftoken', 'value': 'token', 'path': '/'}]
+
+
+class LoginTests(KobotoolboxSeleniumMixin, WaiterMixin, SimpleTestCase):
+    CACHE_LOGIN_SESSIONS = True
+    LOGIN_TIMEOUT = 2
+
+    def fill_form_and_submit(self, form_selector, **data):
+        self.submitted = data
+
+    def make_screenshot(self, *args, **kwargs):
+        self.screenshots += 1
+        return None
+
+    def setUp(self):
+        self.screenshots = 0
+        self.addCleanup(session_cache.invalidate, ('alice', ''))
+
+    def test_cookies_are_cached_after_leaving_the_login_page(self):
+        self.driver = FakeLoginDriver(redirect_after=3)
+        self.log_in_as_user('alice', 'password')
+        self.assertEqual(self.submitted, {'username': 'alice', 'password': 'password'})
+        cookies = session_cache.get(('alice', ''))
+        self.assertEqual([cookie['name'] for cookie in cookies],
+                         ['kobonaut', 'csrftoken'])
+
+    def test_failed_login_is_not_cached(self):
+        self.driver = FakeLoginDriver(redirect_after=float('inf'))
+        self.LOGIN_TIMEOUT = 0.2
+        self.log_in_as_user('alice', 'wrong')
+        self.assertEqual(self.submitted, {'username': 'alice', 'password': 'wrong'})
+        self.assertIsNone(session_cache.get(('alice', '')))
+        self.assertEqual(self.screenshots, 0)
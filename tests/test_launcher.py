@@ -0,0 +1,121 @@
+import functools
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+from selenium import webdriver
+
+from puppetmaster.launcher import CHROME_ARGUMENTS, BrowserLauncher
+
+
+class CustomChrome(webdriver.Chrome):
+    pass
+
+
+class FakeChrome(webdriver.Chrome):
+    """Chrome driver class which launches nothing"""
+
+    def __init__(self, options=None) -> None:
+        if options is None:
+            raise TypeError('options are required')
+        self.arguments = options.arguments
+        self.quit_called = False
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class FakeDriver:
+    def __init__(self) -> None:
+        self.quit_called = False
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class LauncherProfileTests(SimpleTestCase):
+    def setUp(self):
+        self.launcher = BrowserLauncher(spares=0)
+        self.addCleanup(self.launcher.close)
+        # A prepared template, so no browser is launched
+        self.launcher._template = tempfile.mkdtemp()
+        self.launcher._directories.append(self.launcher._template)
+
+    def test_chrome_options_are_extended(self):
+        options = webdriver.ChromeOptions()
+        options.headless = True
+        driver = functools.partial(CustomChrome, options=options)
+        kwargs = self.launcher.profile_kwargs(driver)
+        arguments = kwargs['options'].arguments
+        self.assertIn('--headless', arguments)
+        self.assertTrue(set(CHROME_ARGUMENTS) <= set(arguments))
+        self.assertTrue(any(argument.startswith('--user-data-dir=')
+                            for argument in arguments))
+        # Every browser gets its own profile copy, the options are not shared
+        self.assertEqual(options.arguments, ['--headless'])
+
+    def test_deprecated_chrome_options_are_extended(self):
+        options = webdriver.ChromeOptions()
+        options.add_argument('--lang=en')
+        kwargs = self.launcher.profile_kwargs(
+            functools.partial(webdriver.Chrome, chrome_options=options))
+        self.assertEqual(list(kwargs), ['chrome_options'])
+        self.assertIn('--lang=en', kwargs['chrome_options'].arguments)
+
+    def test_other_drivers_are_launched_as_they_are(self):
+        self.assertEqual(self.launcher.profile_kwargs(webdriver.Remote), {})
+
+    def test_profile_copy_is_removed_on_quit(self):
+        driver = self.launcher.launch(FakeChrome)
+        [directory] = [argument.split('=', 1)[1] for argument in driver.arguments
+                       if argument.startswith('--user-data-dir=')]
+        self.assertTrue(os.path.isdir(directory))
+        driver.quit()
+        self.assertTrue(driver.quit_called)
+        self.assertFalse(os.path.exists(directory))
+        self.assertEqual(self.launcher._directories, [self.launcher._template])
+
+    def test_profile_copy_is_removed_when_launching_fails(self):
+        with self.assertRaises(TypeError):
+            self.launcher.launch(functools.partial(FakeChrome, unknown=True))
+        self.assertEqual(self.launcher._directories, [self.launcher._template])
+
+
+class LauncherTests(SimpleTestCase):
+    def test_spares_are_launched_in_the_background(self):
+        launcher = BrowserLauncher(spares=2)
+        launched = []
+        lock = threading.Lock()
+
+        def factory():
+            driver = FakeDriver()
+            with lock:
+                launched.append(driver)
+            return driver
+
+        first = launcher.take(factory)
+        second = launcher.take(factory)
+        self.assertIsNot(first, second)
+        with launcher._condition:
+            launcher._condition.wait_for(lambda: not launcher._pending)
+        self.assertEqual(launcher.stats.spawned, len(launched))
+        self.assertEqual(launcher.stats.ready + launcher.stats.waited, 2)
+        launcher.close()
+        idle = [driver for driver in launched if driver not in (first, second)]
+        self.assertEqual(len(idle), 2)
+        self.assertTrue(all(driver.quit_called for driver in idle))
+        self.assertFalse(first.quit_called or second.quit_called)
+
+    def test_launch_errors_are_raised_by_take(self):
+        launcher = BrowserLauncher(spares=1)
+        self.addCleanup(launcher.close)
+
+        def factory():
+            raise TypeError('unexpected keyword argument')
+
+        with self.assertRaises(TypeError):
+            launcher.take(factory)
+        with launcher._condition:
+            launcher._condition.wait_for(lambda: not launcher._pending)
+        self.assertEqual(launcher.stats.failed, 1)
@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, modify_settings
+
+from puppetmaster.middleware import AutoLoginMiddleware
+
+
+@modify_settings(MIDDLEWARE={
+    'append': 'puppetmaster.middleware.AutoLoginMiddleware',
+})
+class AutoLoginMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='alice', password='password')
+        self.other_user = get_user_model().objects.create_user(
+            username='bob', password='password')
+        self.addCleanup(AutoLoginMiddleware.reset)
+
+    def stats(self):
+        return AutoLoginMiddleware.stats.as_dict()
+
+    def test_logged_in_session_is_skipped(self):
+        AutoLoginMiddleware.user = self.user
+        before = self.stats()
+        self.client.get('/form/1/')
+        self.client.get('/form/1/')
+        self.client.get('/form/1/')
+        after = self.stats()
+        self.assertEqual(after['logins'] - before['logins'], 1)
+        self.assertEqual(after['skipped'] - before['skipped'], 2)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.pk)
+
+    def test_user_cookie_logs_in_as_its_user(self):
+        AutoLoginMiddleware.user = self.user
+        cookie = AutoLoginMiddleware.user_cookie(self.other_user)
+        self.client.cookies[cookie['name']] = cookie['value']
+        before = self.stats()
+        self.client.get('/form/1/')
+        self.client.get('/form/1/')
+        after = self.stats()
+        self.assertEqual(after['logins'] - before['logins'], 1)
+        self.assertEqual(int(self.client.session['_auth_user_id']),
+                         self.other_user.pk)
+
+    def test_changed_password_logs_in_again(self):
+        AutoLoginMiddleware.user = self.user
+        self.client.get('/form/1/')
+        self.user.set_password('changed')
+        self.user.save()
+        before = self.stats()
+        self.client.get('/form/1/')
+        self.assertEqual(self.stats()['logins'] - before['logins'], 1)
+
+    def test_without_user_nobody_is_logged_in(self):
+        before = self.stats()
+        self.client.get('/form/1/')
+        self.assertEqual(self.stats(), before)
+        self.assertNotIn('_auth_user_id', self.client.session)
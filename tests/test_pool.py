@@ -0,0 +1,122 @@
+import types
+import typing as t
+
+from django.test import SimpleTestCase
+from selenium.common.exceptions import WebDriverException
+
+from puppetmaster.pool import CLEAR_STORAGE_SCRIPT, DriverPool
+
+WINDOW_SIZE = (1280, 1024)
+
+
+class FakeSwitchTo:
+    def __init__(self, driver: 'FakeDriver') -> None:
+        self.driver = driver
+
+    def window(self, handle: str) -> None:
+        self.driver.current_window = handle
+
+
+class FakeDriver:
+    """Driver keeping the state DriverPool.reset works on"""
+
+    def __init__(self, windows: int = 1) -> None:
+        self.window_handles = [f'window-{index}' for index in range(windows)]
+        self.current_window = self.window_handles[0] if windows else ''
+        self.cookies = [{'name': 'sessionid', 'value': 'secret'}]
+        self.scripts: t.List[str] = []
+        self.url = 'http://localhost/'
+        self.window_size = (800, 600)
+        self.quit_called = False
+        self.fail_reset = False
+        self.switch_to = FakeSwitchTo(self)
+        self.command_executor = types.SimpleNamespace(_commands={})
+
+    def close(self) -> None:
+        self.window_handles.remove(self.current_window)
+
+    def execute(self, command: str, params: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        assert command in self.command_executor._commands
+        handle = f'window-{len(self.window_handles)}-new'
+        self.window_handles.append(handle)
+        return {'value': {'handle': handle, 'type': params['type']}}
+
+    def delete_all_cookies(self) -> None:
+        if self.fail_reset:
+            raise WebDriverException('Browser is gone')
+        self.cookies = []
+
+    def execute_script(self, script: str) -> None:
+        self.scripts.append(script)
+
+    def get(self, url: str) -> None:
+        self.url = url
+
+    def set_window_size(self, width: int, height: int) -> None:
+        self.window_size = (width, height)
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class FakeChromeDriver(FakeDriver):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cdp_commands: t.List[str] = []
+
+    def execute_cdp_cmd(self, command: str, params: t.Dict[str, t.Any]) -> None:
+        self.cdp_commands.append(command)
+
+
+class DriverPoolResetTests(SimpleTestCase):
+    def test_reset_closes_extra_windows_and_clears_state(self):
+        driver = FakeDriver(windows=3)
+        DriverPool.reset(driver, WINDOW_SIZE)
+        self.assertEqual(driver.window_handles, ['window-0'])
+        self.assertEqual(driver.current_window, 'window-0')
+        self.assertEqual(driver.cookies, [])
+        self.assertEqual(driver.scripts, [CLEAR_STORAGE_SCRIPT])
+        self.assertEqual(driver.url, 'about:blank')
+        self.assertEqual(driver.window_size, WINDOW_SIZE)
+
+    def test_reset_clears_cookies_of_every_host_in_chrome(self):
+        driver = FakeChromeDriver()
+        DriverPool.reset(driver, WINDOW_SIZE)
+        self.assertEqual(driver.cdp_commands, ['Network.clearBrowserCookies'])
+
+    def test_reset_opens_a_window_when_all_were_closed(self):
+        driver = FakeDriver(windows=0)
+        DriverPool.reset(driver, WINDOW_SIZE)
+        self.assertEqual(len(driver.window_handles), 1)
+        self.assertEqual(driver.current_window, driver.window_handles[0])
+        self.assertEqual(driver.url, 'about:blank')
+
+
+class DriverPoolTests(SimpleTestCase):
+    def test_released_driver_is_reused(self):
+        pool = DriverPool(size=1)
+        driver = pool.acquire(FakeDriver)
+        pool.release(driver, WINDOW_SIZE)
+        self.assertIs(pool.acquire(FakeDriver), driver)
+        self.assertEqual(pool.stats.as_dict(),
+                         {'launches': 1, 'reuses': 1, 'failed_resets': 0})
+
+    def test_driver_failing_to_reset_is_replaced(self):
+        pool = DriverPool(size=1)
+        driver = pool.acquire(FakeDriver)
+        driver.fail_reset = True
+        pool.release(driver, WINDOW_SIZE)
+        self.assertTrue(driver.quit_called)
+        self.assertIsNot(pool.acquire(FakeDriver), driver)
+        self.assertEqual(pool.stats.as_dict(),
+                         {'launches': 2, 'reuses': 0, 'failed_resets': 1})
+
+    def test_drivers_over_size_are_quit(self):
+        pool = DriverPool(size=1)
+        first, second = pool.acquire(FakeDriver), pool.acquire(FakeDriver)
+        pool.release(first, WINDOW_SIZE)
+        pool.release(second, WINDOW_SIZE)
+        self.assertFalse(first.quit_called)
+        self.assertTrue(second.quit_called)
+        pool.close()
+        self.assertTrue(first.quit_called)
@@ -0,0 +1,23 @@
+import unittest
+
+from django.test import SimpleTestCase
+
+from puppetmaster.core import SeleniumTestsMixin
+from puppetmaster.profiler import issuing_helpers
+
+
+class IssuingHelpersTests(SimpleTestCase):
+    class Profiled(SeleniumTestsMixin, unittest.TestCase):
+        def setUp(self):
+            pass
+
+        def tearDown(self):
+            pass
+
+        def test_body(self):
+            self.helpers = issuing_helpers()
+
+    def test_test_case_methods_are_not_helpers(self):
+        test = self.Profiled('test_body')
+        self.assertTrue(test.run().wasSuccessful())
+        self.assertEqual(test.helpers, ())
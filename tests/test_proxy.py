@@ -0,0 +1,30 @@
+import functools
+
+from django.test import SimpleTestCase
+from selenium import webdriver
+
+from puppetmaster.proxy import BlockingProxy
+
+
+class CustomChrome(webdriver.Chrome):
+    pass
+
+
+class ProxyCapabilitiesTests(SimpleTestCase):
+    def setUp(self):
+        self.proxy = BlockingProxy(['example.com'])
+        self.addCleanup(self.proxy.server_close)
+
+    def test_browser_defaults_are_kept(self):
+        for driver, browser in [
+                (webdriver.Chrome, 'chrome'),
+                (CustomChrome, 'chrome'),
+                (functools.partial(webdriver.Firefox, timeout=5), 'firefox')]:
+            capabilities = self.proxy.capabilities(driver)
+            self.assertEqual(capabilities['browserName'], browser)
+            self.assertEqual(capabilities['proxy']['httpProxy'], self.proxy.address)
+
+    def test_other_drivers_only_get_the_proxy(self):
+        capabilities = self.proxy.capabilities(webdriver.Remote)
+        self.assertEqual(list(capabilities), ['proxy'])
+        self.assertEqual(capabilities['proxy']['sslProxy'], self.proxy.address)
@@ -0,0 +1,61 @@
+import sqlite3
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from puppetmaster import SeleniumLiveServerTestCase
+from puppetmaster.snapshots import (
+    SerializedSnapshot,
+    SqliteSnapshot,
+    create_snapshot,
+    seed_timings)
+
+
+def usernames():
+    return sorted(get_user_model().objects.values_list('username', flat=True))
+
+
+class DatabaseSnapshotTests(TransactionTestCase):
+    def check_restores(self, snapshot):
+        get_user_model().objects.create_user(username='seeded')
+        snapshot.capture()
+        get_user_model().objects.all().delete()
+        snapshot.restore()
+        self.assertEqual(usernames(), ['seeded'])
+        # Sequences are moved past the restored rows
+        get_user_model().objects.create_user(username='created')
+        self.assertEqual(usernames(), ['created', 'seeded'])
+
+    @unittest.skipUnless(hasattr(sqlite3.Connection, 'backup'),
+                         'The SQLite backup API needs Python >= 3.7')
+    def test_sqlite_snapshot(self):
+        snapshot = create_snapshot()
+        self.assertIsInstance(snapshot, SqliteSnapshot)
+        self.check_restores(snapshot)
+
+    def test_serialized_snapshot(self):
+        self.check_restores(SerializedSnapshot())
+
+
+class SeedDatabaseTests(SeleniumLiveServerTestCase):
+    HTTP_FAST_PATH = True
+    should_login_automatically = False
+    starting_url = '/form/1/'
+
+    def seed_database(self):
+        get_user_model().objects.create_user(username='seeded')
+
+    def check_seeded(self):
+        self.assertEqual(usernames(), ['seeded'])
+        timings = seed_timings[f'{__name__}.{type(self).__qualname__}']
+        # Seeded by the first test of the class, restored for the other one
+        self.assertEqual(timings.seeds, 1)
+
+    def test_seeded(self):
+        self.check_seeded()
+        get_user_model().objects.create_user(username='changed')
+
+    def test_seeded_again(self):
+        self.check_seeded()
+        get_user_model().objects.create_user(username='changed')
@@ -0,0 +1,114 @@
+import gzip
+import os
+import tempfile
+import urllib.error
+import urllib.request
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from puppetmaster import SeleniumLiveServerTestCase
+from puppetmaster.static import (
+    CachedStaticFilesHandler,
+    StaticAsset,
+    StaticAssetIndex,
+    static_index)
+
+ASSET_PATH = 'fixture_app/react_select.js'
+
+
+class StaticAssetTests(SimpleTestCase):
+    def setUp(self):
+        with open(finders.find(ASSET_PATH), 'rb') as f:
+            self.content = f.read()
+        self.asset = StaticAsset(ASSET_PATH, self.content)
+        self.factory = RequestFactory()
+
+    def test_response(self):
+        response = self.asset.response(self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.content)
+        self.assertEqual(response['Content-Type'], self.asset.content_type)
+        self.assertTrue(self.asset.content_type.endswith('javascript'))
+        self.assertEqual(response['ETag'], self.asset.etag)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_variant(self):
+        response = self.asset.response(
+            self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.asset.response(
+            self.factory.get('/', HTTP_IF_NONE_MATCH=self.asset.etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], self.asset.etag)
+
+    def test_other_etag_is_served(self):
+        response = self.asset.response(
+            self.factory.get('/', HTTP_IF_NONE_MATCH='"other"'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_small_assets_are_not_compressed(self):
+        asset = StaticAsset('small.js', b'var a = 1;')
+        self.assertEqual(list(asset.variants), ['identity'])
+
+
+class StaticAssetIndexTests(SimpleTestCase):
+    def test_prefixed_directories_keep_their_prefix(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'app.css'), 'w') as f:
+                f.write('body {}')
+            with override_settings(STATICFILES_DIRS=[('vendor', directory)]):
+                index = StaticAssetIndex()
+                index.build()
+        self.assertIsNotNone(index.get(os.path.join('vendor', 'app.css')))
+        self.assertIsNone(index.get('app.css'))
+        self.assertIsNotNone(index.get(ASSET_PATH))
+
+
+class StaticFilesFromDiskTests(SeleniumLiveServerTestCase):
+    HTTP_FAST_PATH = True
+    should_login_automatically = False
+    starting_url = '/form/1/'
+
+    def test_static_index_is_off_by_default(self):
+        self.assertIs(self.static_handler, StaticFilesHandler)
+
+
+class CachedStaticFilesTests(SeleniumLiveServerTestCase):
+    CACHE_STATIC_FILES = True
+    HTTP_FAST_PATH = True
+    should_login_automatically = False
+    starting_url = '/form/1/'
+
+    def fetch(self, path, **headers):
+        request = urllib.request.Request(self.live_server_url + path,
+                                         headers=headers)
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+
+    def test_static_handler(self):
+        self.assertIs(self.static_handler, CachedStaticFilesHandler)
+
+    def test_conditional_request_is_not_modified(self):
+        served, not_modified = (static_index.stats.served,
+                                static_index.stats.not_modified)
+        status, headers, content = self.fetch(f'/static/{ASSET_PATH}')
+        self.assertEqual(status, 200)
+        self.assertEqual(content, static_index.get(ASSET_PATH).variants['identity'])
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.fetch(f'/static/{ASSET_PATH}', **{'If-None-Match': headers['ETag']})
+        self.assertEqual(context.exception.code, 304)
+        self.assertEqual(static_index.stats.served, served + 1)
+        self.assertEqual(static_index.stats.not_modified, not_modified + 1)
+
+    def test_missing_asset_falls_back_to_finders(self):
+        fallbacks = static_index.stats.fallbacks
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.fetch('/static/fixture_app/missing.js')
+        self.assertEqual(context.exception.code, 404)
+        self.assertEqual(static_index.stats.fallbacks, fallbacks + 1)
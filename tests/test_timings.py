@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from puppetmaster.core import SeleniumTestsMixin
+from puppetmaster.runner import (
+    PuppetMasterParallelTestSuite,
+    PuppetMasterTestRunner,
+    iter_tests,
+    parse_shard)
+from puppetmaster.timings import (
+    DEFAULT_TEST_DURATION,
+    TimingRecorder,
+    Timings,
+    longest_first,
+    split_shards,
+    test_class_id)
+
+
+class Test(unittest.TestCase):
+    def runTest(self):
+        pass
+
+
+class TimingRecorderTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'timings.json')
+
+    def test_timings_are_merged_into_the_file(self):
+        first = TimingRecorder(self.path)
+        first.record_test('tests.A.test_a', 'body', 2.0)
+        first.record_test('tests.A.test_b', 'body', 5.0)
+        first.write()
+        second = TimingRecorder(self.path)
+        second.record_test('tests.A.test_a', 'setup', 1.0)
+        second.record_test('tests.A.test_a', 'body', 3.0)
+        second.record_class('tests.A', 'setup', 4.0)
+        second.write()
+
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data, {
+            'tests': {'tests.A.test_a': {'setup': 1.0, 'body': 3.0},
+                      'tests.A.test_b': {'body': 5.0}},
+            'classes': {'tests.A': {'setup': 4.0}},
+        })
+        timings = Timings.load(self.path)
+        self.assertEqual(timings.test_duration('tests.A.test_a'), 4.0)
+
+    def test_nothing_recorded_leaves_no_file(self):
+        TimingRecorder(self.path).write()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TimingsTests(SimpleTestCase):
+    def test_unknown_tests_are_estimated_as_the_median(self):
+        timings = Timings({'a': {'body': 1.0}, 'b': {'body': 3.0},
+                           'c': {'body': 10.0}}, {})
+        self.assertEqual(timings.test_duration('unknown'), 3.0)
+
+    def test_default_duration_without_timings(self):
+        self.assertEqual(Timings({}, {}).test_duration('unknown'),
+                         DEFAULT_TEST_DURATION)
+
+    def test_suite_duration_counts_each_class_once(self):
+        test = Test()
+        timings = Timings({test.id(): {'body': 2.0}},
+                          {test_class_id(Test): {'setup': 5.0}})
+        self.assertEqual(timings.suite_duration([test, test]), 9.0)
+
+
+class ShardingTests(SimpleTestCase):
+    durations = {'a': 10.0, 'b': 7.0, 'c': 6.0, 'd': 4.0, 'e': 3.0}
+
+    def test_longest_first(self):
+        self.assertEqual(longest_first(['e', 'a', 'c'], self.durations.get),
+                         ['a', 'c', 'e'])
+
+    def test_shards_are_balanced(self):
+        shards = split_shards(self.durations, 2, self.durations.get)
+        self.assertEqual(shards, [['a', 'd'], ['b', 'c', 'e']])
+        self.assertEqual([sum(map(self.durations.get, shard)) for shard in shards],
+                         [14.0, 16.0])
+
+    def test_every_item_is_in_one_shard(self):
+        shards = split_shards(self.durations, 3, self.durations.get)
+        self.assertEqual(sorted(sum(shards, [])), sorted(self.durations))
+        self.assertEqual(len(split_shards([], 3, self.durations.get)), 3)
+
+
+class PhaseTimingTests(SimpleTestCase):
+    class Timed(SeleniumTestsMixin, unittest.TestCase):
+        # Stands in for the mixin's setUp and tearDown, which need a browser
+        def setUp(self):
+            with self.timed_phase('setup'):
+                time.sleep(0.05)
+
+        def tearDown(self):
+            with self.timed_phase('teardown'):
+                time.sleep(0.05)
+
+        def test_body(self):
+            time.sleep(0.2)
+
+    def test_phases_are_recorded(self):
+        recorder = TimingRecorder('unused.json')
+        test = self.Timed('test_body')
+        with mock.patch('puppetmaster.core.get_timing_recorder',
+                        return_value=recorder):
+            result = test.run()
+        self.assertTrue(result.wasSuccessful())
+        times = recorder.tests[test.id()]
+        self.assertEqual(sorted(times), ['body', 'setup', 'teardown'])
+        self.assertGreaterEqual(times['setup'], 0.05)
+        self.assertGreaterEqual(times['teardown'], 0.05)
+        self.assertGreaterEqual(times['body'], 0.2)
+
+
+class ShardArgumentTests(SimpleTestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/3'), (2, 3))
+        for shard in ['0/2', '3/2', '-1/2', '1', '1/x', '']:
+            with self.subTest(shard=shard), self.assertRaises(ValueError):
+                parse_shard(shard)
+
+    def test_parser_rejects_invalid_shards(self):
+        parser = argparse.ArgumentParser()
+        PuppetMasterTestRunner.add_arguments(parser)
+        self.assertEqual(parser.parse_args(['--shard', '1/2']).shard, '1/2')
+        with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+            parser.parse_args(['--shard', '0/2'])
+
+    def test_shards_cover_the_suite_once(self):
+        def test_ids(shard):
+            suite = PuppetMasterTestRunner(shard=shard, verbosity=0).build_suite(
+                ['tests.test_timings'])
+            return [test.id() for test in iter_tests(suite)]
+
+        everything = test_ids(None)
+        first, second = test_ids('1/2'), test_ids('2/2')
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(sorted(first + second), sorted(everything))
+        with self.assertRaises(ValueError):
+            PuppetMasterTestRunner(shard='3/2')
+
+    def test_shards_run_in_parallel(self):
+        def parallel_suite(shard):
+            runner = PuppetMasterTestRunner(parallel=2, shard=shard, verbosity=0)
+            return runner, runner.build_suite(['tests.test_timings'])
+
+        _, everything = parallel_suite(None)
+        shards = [parallel_suite('1/2'), parallel_suite('2/2')]
+        test_ids = []
+        for runner, suite in shards:
+            self.assertIsInstance(suite, PuppetMasterParallelTestSuite)
+            self.assertEqual(runner.parallel, 2)
+            test_ids += [test.id() for subsuite in suite.subsuites
+                         for test in iter_tests(subsuite)]
+        self.assertEqual(sorted(test_ids),
+                         sorted(test.id() for subsuite in everything.subsuites
+                                for test in iter_tests(subsuite)))
@@ -0,0 +1,125 @@
+import time
+import typing as t
+
+from django.test import SimpleTestCase
+from selenium.common.exceptions import (
+    StaleElementReferenceException,
+    TimeoutException)
+
+from puppetmaster.waiter import (
+    BrowserCondition,
+    WaitBackends,
+    WaiterMixin,
+    stale_element_retries)
+
+
+class StaleWaiter(WaiterMixin):
+    """Waiter whose conditions go stale `stale` times before they are met.
+
+    Every try takes `try_time` seconds, or the time left if that is shorter.
+    """
+
+    def __init__(self, stale: int, try_time: float = 0.0) -> None:
+        super().__init__()
+        self.stale = stale
+        self.try_time = try_time
+        self.tries: t.Dict[str, int] = {}
+        self.timeouts: t.List[float] = []
+        self.screenshots = 0
+
+    def _wait(self, condition, timeout):
+        self.timeouts.append(timeout)
+        time.sleep(min(self.try_time, timeout))
+        selector = condition.selector
+        self.tries[selector] = self.tries.get(selector, 0) + 1
+        if self.tries[selector] <= self.stale:
+            raise StaleElementReferenceException(condition.selector)
+        return condition.selector
+
+    def make_screenshot(self, id_iter=None):
+        self.screenshots += 1
+        return None
+
+
+class TimingOutWaiter(StaleWaiter):
+    def _wait(self, condition, timeout):
+        raise TimeoutException(condition.selector)
+
+
+class WaitTests(SimpleTestCase):
+    def test_retries_share_one_deadline(self):
+        waiter = StaleWaiter(stale=10, try_time=0.15)
+        start = time.monotonic()
+        with self.assertRaises(TimeoutException):
+            waiter.wait(BrowserCondition('.stale'), timeout=0.3, max_tries=10)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertLessEqual(waiter.timeouts[0], 0.3)
+        self.assertEqual(waiter.timeouts, sorted(waiter.timeouts, reverse=True))
+
+    def test_stale_retries_are_counted_per_selector(self):
+        before = stale_element_retries.copy()
+        waiter = StaleWaiter(stale=2)
+        self.assertEqual(waiter.wait(BrowserCondition('.retried-twice')),
+                         '.retried-twice')
+        waiter.stale = 1
+        waiter.wait(BrowserCondition('.retried-once'))
+        self.assertEqual(stale_element_retries['.retried-twice']
+                         - before['.retried-twice'], 2)
+        self.assertEqual(stale_element_retries['.retried-once']
+                         - before['.retried-once'], 1)
+
+    def test_one_artifact_per_failed_wait(self):
+        waiter = StaleWaiter(stale=10)
+        with self.assertRaises(TimeoutException):
+            waiter.wait(BrowserCondition('.stale'), max_tries=3)
+        self.assertEqual(waiter.screenshots, 1)
+
+        waiter = TimingOutWaiter(stale=0)
+        with self.assertRaises(TimeoutException):
+            waiter.wait(BrowserCondition('.missing'))
+        self.assertEqual(waiter.screenshots, 1)
+
+    def test_met_wait_takes_no_artifact(self):
+        waiter = StaleWaiter(stale=1)
+        waiter.wait(BrowserCondition('.retried-once'))
+        self.assertEqual(waiter.screenshots, 0)
+
+
+class FakeAsyncDriver:
+    def __init__(self) -> None:
+        self.script_timeouts: t.List[float] = []
+
+    def set_script_timeout(self, timeout: float) -> None:
+        self.script_timeouts.append(timeout)
+
+    def execute_async_script(self, script: str, *args) -> str:
+        return 'element'
+
+
+class ObserverWaiter(WaiterMixin):
+    WAIT_BACKEND = WaitBackends.Observer
+
+
+class ScriptTimeoutTests(SimpleTestCase):
+    def test_script_timeout_is_set_by_observer_waits(self):
+        waiter = ObserverWaiter()
+        waiter.driver = FakeAsyncDriver()
+        waiter.wait_for_element('.item', timeout=5)
+        waiter.wait_for_element('.item', timeout=10)
+        self.assertEqual(waiter.driver.script_timeouts, [60])
+
+    def test_script_timeout_is_raised_for_longer_waits(self):
+        waiter = ObserverWaiter()
+        waiter.driver = FakeAsyncDriver()
+        waiter.wait_for_element('.item', timeout=120)
+        waiter.wait_for_element('.item', timeout=5)
+        [script_timeout] = waiter.driver.script_timeouts
+        # The time left of the wait, plus a second
+        self.assertAlmostEqual(script_timeout, 121, places=2)
+
+    def test_polling_waits_leave_the_script_timeout(self):
+        waiter = WaiterMixin()
+        waiter.driver = FakeAsyncDriver()
+        waiter.driver.find_element_by_css_selector = lambda selector: 'element'
+        waiter.wait_for_element('.item')
+        self.assertEqual(waiter.driver.script_timeouts, [])